@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "SeekerOfLight.settings")
+# Serve the read endpoints with their async views (see core.async_urls)
+os.environ.setdefault("DJANGO_ASYNC_VIEWS", "1")
 
 application = get_asgi_application()
@@ -52,7 +52,8 @@ INSTALLED_APPS = [
     'drf_spectacular',
 ]
 
-MIDDLEWARE = [
+FULL_MIDDLEWARE = [
+    "core.middleware.TimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -62,6 +63,35 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# API mode: requests under API_PATH_PREFIXES skip the session/CSRF/auth/
+# messages/clickjacking middleware (JWT-only, nothing browser-facing) and
+# DRF tries a single authenticator. Everything else, e.g. /admin/, still
+# goes through BROWSER_MIDDLEWARE.
+API_MODE = environ.get("DJANGO_API_MODE", "0") == "1"
+
+API_PATH_PREFIXES = ("/content/", "/accounts/")
+
+BROWSER_MIDDLEWARE = [
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "django.middleware.csrf.CsrfViewMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "django.contrib.messages.middleware.MessageMiddleware",
+    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+]
+
+API_MIDDLEWARE = [
+    "core.middleware.TimingMiddleware",
+    "django.middleware.security.SecurityMiddleware",
+    "django.middleware.common.CommonMiddleware",
+    "core.middleware.BrowserOnlyMiddleware",
+]
+
+MIDDLEWARE = API_MIDDLEWARE if API_MODE else FULL_MIDDLEWARE
+
+if API_MODE:
+    # The admin's middleware checks can't see through BrowserOnlyMiddleware
+    SILENCED_SYSTEM_CHECKS = ["admin.E408", "admin.E409", "admin.E410"]
+
 ROOT_URLCONF = "SeekerOfLight.urls"
 
 TEMPLATES = [
@@ -81,13 +111,15 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "SeekerOfLight.wsgi.application"
 
+# Route the read-heavy content endpoints to their async views; set by asgi.py
+ASYNC_VIEWS = environ.get("DJANGO_ASYNC_VIEWS", "0") == "1"
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    # "default": {},
-    'default': {
+DATABASE_PROFILES = {
+    "sqlite": {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': CONTENT_DIR / 'db.sqlite3',
     },
@@ -97,10 +129,125 @@ DATABASES = {
         'USER': environ.get("POSTGRES_USER"),
         'PASSWORD': environ.get("POSTGRES_PASSWORD"),
         'HOST': environ.get("POSTGRES_HOST"),
-        'PORT': int(environ.get("POSTGRES_PORT"))
+        'PORT': int(environ.get("POSTGRES_PORT") or 5432),
+    }
+}
+
+# Each worker process keeps a psycopg pool of POSTGRES_POOL_MIN_SIZE..MAX_SIZE
+# connections; workers x max size must stay below the server's
+# max_connections. Without the pool, connections persist for
+# POSTGRES_CONN_MAX_AGE seconds instead. Either way a connection is checked
+# before being reused.
+DATABASE_PROFILES["production"]["CONN_HEALTH_CHECKS"] = True
+
+if environ.get("POSTGRES_POOL", "1") == "1":
+    DATABASE_PROFILES["production"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(environ.get("POSTGRES_POOL_MIN_SIZE", 2)),
+            "max_size": int(environ.get("POSTGRES_POOL_MAX_SIZE", 10)),
+            "timeout": float(environ.get("POSTGRES_POOL_TIMEOUT", 10)),
+        },
+    }
+else:
+    DATABASE_PROFILES["production"]["CONN_MAX_AGE"] = int(
+        environ.get("POSTGRES_CONN_MAX_AGE", 600)
+    )
+
+DATABASES = {
+    "default": DATABASE_PROFILES[environ.get("DJANGO_DATABASE", "sqlite")],
+}
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": environ.get(
+            "DJANGO_CACHE_BACKEND", "core.cache.LocMemCache"
+        ),
+        "LOCATION": environ.get("DJANGO_CACHE_LOCATION", "seeker-of-light"),
     }
 }
 
+# Seconds a catalog (levels/lessons) entry may live; edits invalidate it sooner
+CATALOG_CACHE_TIMEOUT = int(environ.get("CATALOG_CACHE_TIMEOUT", 60 * 60 * 24))
+
+# Request timing (core.middleware.TimingMiddleware): requests and single
+# queries slower than this many milliseconds go to the core.timing.slow log
+SLOW_REQUEST_MS = float(environ.get("DJANGO_SLOW_REQUEST_MS", 500))
+SLOW_QUERY_MS = float(environ.get("DJANGO_SLOW_QUERY_MS", 100))
+
+# Bearer token Prometheus must send to read /metrics (core.metrics); unset,
+# the endpoint answers 404
+METRICS_TOKEN = environ.get("METRICS_TOKEN", "")
+
+# Logging
+# https://docs.djangoproject.com/en/5.2/topics/logging/
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        # One JSON line per request at INFO; slow requests/queries at WARNING
+        "core.timing": {
+            "handlers": ["console"],
+            "level": environ.get("DJANGO_LOGLEVEL", "warning").upper(),
+            "propagate": False,
+        },
+    },
+}
+
+# Password hashing
+# https://docs.djangoproject.com/en/5.2/topics/auth/passwords/
+
+# Cost parameters for the hashers in users.hashers (defaults match Django's)
+PASSWORD_HASHER_PARAMS = {
+    "pbkdf2_sha256": {
+        "iterations": int(environ.get("PBKDF2_ITERATIONS", 1_000_000)),
+    },
+    "argon2": {
+        "time_cost": int(environ.get("ARGON2_TIME_COST", 2)),
+        "memory_cost": int(environ.get("ARGON2_MEMORY_COST", 102400)),
+        "parallelism": int(environ.get("ARGON2_PARALLELISM", 8)),
+    },
+    "scrypt": {
+        "work_factor": int(environ.get("SCRYPT_WORK_FACTOR", 2**14)),
+    },
+}
+
+# The first hasher hashes new passwords; the rest only verify (and get
+# upgraded to the first on the next login)
+PASSWORD_HASHER_PROFILES = {
+    "pbkdf2": [
+        "users.hashers.PBKDF2PasswordHasher",
+        "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+        "users.hashers.Argon2PasswordHasher",
+        "users.hashers.ScryptPasswordHasher",
+        "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    ],
+    "argon2": [
+        "users.hashers.Argon2PasswordHasher",
+        "users.hashers.PBKDF2PasswordHasher",
+        "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+        "users.hashers.ScryptPasswordHasher",
+        "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    ],
+    "scrypt": [
+        "users.hashers.ScryptPasswordHasher",
+        "users.hashers.PBKDF2PasswordHasher",
+        "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+        "users.hashers.Argon2PasswordHasher",
+        "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    ],
+}
+
+PASSWORD_HASHERS = PASSWORD_HASHER_PROFILES[
+    environ.get("DJANGO_PASSWORD_HASHER", "pbkdf2")
+]
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -159,13 +306,27 @@ AUTH_USER_MODEL = "users.User"
 
 
 # DRF Settings
+# "users.authentication.StatelessJWTAuthentication" skips the per-request user query
+JWT_AUTHENTICATION_CLASS = environ.get(
+    "JWT_AUTHENTICATION_CLASS",
+    "rest_framework_simplejwt.authentication.JWTAuthentication",
+)
+
+FULL_AUTHENTICATION_CLASSES = (
+    JWT_AUTHENTICATION_CLASS,
+    # Lets the browsable API reuse an admin session
+    'rest_framework.authentication.SessionAuthentication',
+)
+
+API_AUTHENTICATION_CLASSES = (JWT_AUTHENTICATION_CLASS,)
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
-        'rest_framework.authentication.TokenAuthentication',
-        'rest_framework.authentication.SessionAuthentication',
+        API_AUTHENTICATION_CLASSES if API_MODE else FULL_AUTHENTICATION_CLASSES
     ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.CourseCursorPagination',
+    'PAGE_SIZE': int(environ.get("API_PAGE_SIZE", 50)),
 }
 
 # Simple-JWT 
@@ -174,6 +335,14 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(hours=12),
 }
 
+# Seconds a user's token_version may be served from the cache (see
+# users.tokens). Revocations reach processes that don't share the cache
+# within this time, so it never exceeds an access token's lifetime.
+TOKEN_VERSION_CACHE_TIMEOUT = min(
+    int(environ.get("TOKEN_VERSION_CACHE_TIMEOUT", 60)),
+    int(SIMPLE_JWT["ACCESS_TOKEN_LIFETIME"].total_seconds()),
+)
+
 # Email Settings
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 
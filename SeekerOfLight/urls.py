@@ -15,15 +15,21 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
+from django.conf import settings
 from django.contrib import admin
 from django.urls import include, path
 from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
 
+from core.health import readiness
+from core.metrics import metrics
+
 urlpatterns = [
     path('', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
     path("admin/", admin.site.urls),
     path("accounts/", include("users.urls")),
-    path("content/", include("core.urls")),
+    path("content/", include("core.async_urls" if settings.ASYNC_VIEWS else "core.urls")),
+    path("health/ready/", readiness, name="readiness"),
+    path("metrics", metrics, name="metrics"),
     # YOUR PATTERNS
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
     # Optional UI:
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Level, Lesson, UserProgress
+from .models import Level, Lesson, UserLevelStats, UserProgress
 
 # Register your models here.
 
@@ -22,4 +22,23 @@ class UserProgressAdmin(admin.ModelAdmin):
     list_display = ("id", "user", "lesson", "is_completed", "last_accessed")
     list_filter = ("is_completed", "lesson__level")
     search_fields = ("user__username", "lesson__title")
-    ordering = ('user', 'lesson__level', 'lesson')
\ No newline at end of file
+    ordering = ('user', 'lesson__level', 'lesson')
+
+
+@admin.register(UserLevelStats)
+class UserLevelStatsAdmin(admin.ModelAdmin):
+    # Derived from UserProgress (see core.signals); edit progress instead, or
+    # run `manage.py rebuild_level_stats`
+    list_display = ("id", "user", "level", "completed", "bookmarked")
+    list_filter = ("level",)
+    search_fields = ("user__email",)
+    readonly_fields = ("user", "level", "completed", "bookmarked")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "core"
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .timing import instrument_connections, instrument_serializers
+
+        instrument_connections()
+        instrument_serializers()
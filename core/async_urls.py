@@ -0,0 +1,31 @@
+"""
+`core.urls` with the read-heavy endpoints served by their async views;
+included instead of it when `settings.ASYNC_VIEWS` is on (the ASGI entry
+point turns it on).
+"""
+
+from django.urls import path
+
+from .async_views import (
+    AsyncLessonDetailView,
+    AsyncLevelLessonsView,
+    AsyncLevelListView,
+    AsyncNextLessonView,
+    AsyncUserProgressSummaryView,
+)
+from .urls import urlpatterns as sync_urlpatterns
+
+async_views = {
+    'level-list': AsyncLevelListView,
+    'level-lessons': AsyncLevelLessonsView,
+    'lesson-detail': AsyncLessonDetailView,
+    'progress-summary': AsyncUserProgressSummaryView,
+    'next-lesson': AsyncNextLessonView,
+}
+
+urlpatterns = [
+    path(str(pattern.pattern), async_views[pattern.name].as_view(), name=pattern.name)
+    if pattern.name in async_views
+    else pattern
+    for pattern in sync_urlpatterns
+]
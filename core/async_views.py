@@ -0,0 +1,114 @@
+"""
+Async counterparts of the read-heavy content views, served under ASGI
+(see `core.async_urls`).
+
+Each view subclasses its sync original and only replaces the data loading:
+the cache and the database are read with their async APIs, after which the
+inherited DRF code paginates and serializes from memory.
+"""
+
+from inspect import isawaitable
+
+from asgiref.sync import sync_to_async
+from django.http import Http404
+
+from . import catalog
+from .conditional import AsyncConditionalContentMixin
+from .views import (
+    LessonDetailView,
+    LevelLessonsView,
+    LevelListView,
+    NextLessonView,
+    UserProgressSummaryView,
+)
+
+
+class AsyncAPIViewMixin:
+    """
+    `APIView.dispatch()` with the handler awaited. Authentication, permission
+    and throttle checks are sync in DRF and run in a worker thread.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        return self.adispatch(request, *args, **kwargs)
+
+    async def adispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(
+                    self, request.method.lower(), self.http_method_not_allowed
+                )
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if isawaitable(response):
+                response = await response
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+class AsyncLevelListView(AsyncAPIViewMixin, AsyncConditionalContentMixin, LevelListView):
+    async def aprepare(self, request, *args, **kwargs):
+        self.levels = await catalog.awith_unlock_state(
+            await catalog.aget_active_levels(), request.user
+        )
+
+    def get_queryset(self):
+        return self.levels
+
+
+class AsyncLevelLessonsView(AsyncAPIViewMixin, AsyncConditionalContentMixin, LevelLessonsView):
+    async def aprepare(self, request, *args, **kwargs):
+        level = await catalog.aget_level(kwargs['id'])
+        if level is None or not level.is_active:
+            self.lessons = []
+        else:
+            self.lessons = await catalog.awith_user_progress(
+                await catalog.aget_level_lessons(level.id), request.user
+            )
+
+    def get_queryset(self):
+        return self.lessons
+
+
+class AsyncLessonDetailView(AsyncAPIViewMixin, AsyncConditionalContentMixin, LessonDetailView):
+    async def aprepare(self, request, *args, **kwargs):
+        lesson = await catalog.aget_lesson(kwargs['id'])
+        if lesson is None:
+            raise Http404
+        self.lesson = (await catalog.awith_user_progress([lesson], request.user))[0]
+
+    async def aget_catalog_modified(self, request, *args, **kwargs):
+        lesson = await catalog.aget_lesson(kwargs['id'])
+        return lesson.updated_at if lesson else None
+
+    def get_object(self):
+        self.check_object_permissions(self.request, self.lesson)
+        return self.lesson
+
+
+class AsyncUserProgressSummaryView(AsyncAPIViewMixin, UserProgressSummaryView):
+    async def get(self, request, *args, **kwargs):
+        self.rows = [row async for row in super().get_queryset()]
+        return self.list(request, *args, **kwargs)
+
+    def get_queryset(self):
+        return self.rows
+
+
+class AsyncNextLessonView(AsyncAPIViewMixin, NextLessonView):
+    async def get(self, request, *args, **kwargs):
+        return self.respond(await catalog.aget_next_lesson(request.user))
@@ -0,0 +1,35 @@
+"""
+Cache backends that count hits and misses for `core.timing`.
+
+They subclass Django's backends and change nothing else, so they can be
+swapped in through `DJANGO_CACHE_BACKEND` without touching stored entries.
+"""
+
+from django.core.cache.backends import locmem, redis
+
+from .timing import record_cache
+
+_missing = object()
+
+
+class InstrumentedCacheMixin:
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _missing, version=version)
+        if value is _missing:
+            record_cache(0, 1)
+            return default
+        record_cache(1, 0)
+        return value
+
+
+class LocMemCache(InstrumentedCacheMixin, locmem.LocMemCache):
+    # get_many() and the async methods go through get()
+    pass
+
+
+class RedisCache(InstrumentedCacheMixin, redis.RedisCache):
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = super().get_many(keys, version=version)
+        record_cache(len(found), len(keys) - len(found))
+        return found
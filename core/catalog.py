@@ -0,0 +1,386 @@
+"""
+Cached, read-only view of the course catalog (levels and lessons).
+
+Levels and lessons only change when an editor saves them, so they are kept in
+the default cache under keys that embed a catalog version. `bump_version()` is
+called from the `post_save`/`post_delete` signals on `Level` and `Lesson`;
+it makes every previously cached entry unreachable at once.
+
+Writes that bypass model signals (`bulk_create`, `QuerySet.update`) must call
+`bump_version()` themselves.
+
+The version is only seen by processes sharing the cache: a deployment with
+more than one server process needs a shared backend such as
+`core.cache.RedisCache`, or edits stay invisible to the other processes.
+
+Per-user state is never cached here: `with_unlock_state()` and
+`with_user_progress()` attach it to cached objects with one query each.
+
+Functions prefixed with `a` are async counterparts for the ASGI views; they
+use the cache's async API and the async ORM.
+"""
+
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Level, Lesson, UserLevelStats, UserProgress
+
+VERSION_KEY = "catalog:version"
+
+
+def get_version():
+    """
+    Versions are nanosecond timestamps, so an evicted version is reseeded
+    past every key already written and doubles as the last-change time.
+    """
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+async def aget_version():
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        await cache.aadd(VERSION_KEY, time.time_ns(), None)
+        version = await cache.aget(VERSION_KEY)
+    return version
+
+
+def bump_version(**kwargs):
+    current = cache.get(VERSION_KEY) or 0
+    cache.set(VERSION_KEY, max(time.time_ns(), current + 1), None)
+
+
+def _as_datetime(version):
+    return datetime.fromtimestamp(version / 1e9, tz=timezone.utc)
+
+
+def get_modified():
+    """
+    An upper bound on the time levels or lessons last changed.
+    """
+    return _as_datetime(get_version())
+
+
+async def aget_modified():
+    return _as_datetime(await aget_version())
+
+
+def _key(name, version=None):
+    return f"catalog:{version or get_version()}:{name}"
+
+
+def _cached(name, build):
+    return cache.get_or_set(_key(name), build, settings.CATALOG_CACHE_TIMEOUT)
+
+
+async def _acached(name, build):
+    """
+    `_cached()` for a coroutine function `build`.
+    """
+    key = _key(name, await aget_version())
+    value = await cache.aget(key)
+    if value is None:
+        value = await build()
+        await cache.aadd(key, value, settings.CATALOG_CACHE_TIMEOUT)
+    return value
+
+
+async def _alist(queryset):
+    return [obj async for obj in queryset]
+
+
+def _levels_query():
+    return Level.objects.order_by("order_index")
+
+
+def _level_lessons_query(level_id):
+    return (
+        Lesson.objects.filter(level_id=level_id)
+        .summaries()
+        .select_related("level")
+        .order_by("order_index")
+    )
+
+
+def _course_lessons_query():
+    return (
+        Lesson.objects.summaries()
+        .select_related("level")
+        .order_by("level__order_index", "order_index")
+    )
+
+
+def get_levels():
+    """
+    Every level, active or not, ordered by `order_index`.
+    """
+    return _cached("levels", lambda: list(_levels_query()))
+
+
+async def aget_levels():
+    return await _acached("levels", lambda: _alist(_levels_query()))
+
+
+def get_active_levels():
+    return [level for level in get_levels() if level.is_active]
+
+
+async def aget_active_levels():
+    return [level for level in await aget_levels() if level.is_active]
+
+
+def get_level(level_id):
+    return next((level for level in get_levels() if level.id == level_id), None)
+
+
+async def aget_level(level_id):
+    return next((level for level in await aget_levels() if level.id == level_id), None)
+
+
+def get_level_lessons(level_id):
+    """
+    The lessons of a level in `order_index` order, without content bodies;
+    use `get_lesson()` for those.
+    """
+    return _cached(
+        f"level:{level_id}:lessons", lambda: list(_level_lessons_query(level_id))
+    )
+
+
+async def aget_level_lessons(level_id):
+    return await _acached(
+        f"level:{level_id}:lessons", lambda: _alist(_level_lessons_query(level_id))
+    )
+
+
+def get_course_lessons():
+    """
+    Every lesson in course order (level, then lesson), without content bodies.
+    """
+    return _cached("lessons", lambda: list(_course_lessons_query()))
+
+
+async def aget_course_lessons():
+    return await _acached("lessons", lambda: _alist(_course_lessons_query()))
+
+
+def get_lessons(lesson_ids):
+    """
+    Map each existing id in `lesson_ids` to its lesson, reading the cache
+    first and loading any misses in a single query.
+    """
+    version = get_version()
+    keys = {_key(f"lesson:{pk}", version): pk for pk in lesson_ids}
+    lessons = {keys[key]: lesson for key, lesson in cache.get_many(keys).items()}
+
+    missing = [pk for pk in keys.values() if pk not in lessons]
+    if missing:
+        loaded = {
+            lesson.pk: lesson
+            for lesson in Lesson.objects.filter(pk__in=missing).select_related("level")
+        }
+        cache.set_many(
+            {_key(f"lesson:{pk}", version): lesson for pk, lesson in loaded.items()},
+            settings.CATALOG_CACHE_TIMEOUT,
+        )
+        lessons.update(loaded)
+
+    return lessons
+
+
+async def aget_lessons(lesson_ids):
+    version = await aget_version()
+    keys = {_key(f"lesson:{pk}", version): pk for pk in lesson_ids}
+    lessons = {
+        keys[key]: lesson for key, lesson in (await cache.aget_many(keys)).items()
+    }
+
+    missing = [pk for pk in keys.values() if pk not in lessons]
+    if missing:
+        loaded = {
+            lesson.pk: lesson
+            async for lesson in Lesson.objects.filter(pk__in=missing).select_related(
+                "level"
+            )
+        }
+        await cache.aset_many(
+            {_key(f"lesson:{pk}", version): lesson for pk, lesson in loaded.items()},
+            settings.CATALOG_CACHE_TIMEOUT,
+        )
+        lessons.update(loaded)
+
+    return lessons
+
+
+def get_lesson(lesson_id):
+    return get_lessons([lesson_id]).get(lesson_id)
+
+
+async def aget_lesson(lesson_id):
+    return (await aget_lessons([lesson_id])).get(lesson_id)
+
+
+def _set_unlock_state(levels, completed, all_levels):
+    """
+    The one place the unlock rule lives: the first level, and any level
+    without a predecessor, is open; the rest open once the user completed
+    `unlock_threshold` lessons of the previous level.
+
+    `completed` maps level ids to the user's completed-lesson count;
+    `all_levels` is `get_levels()`.
+    """
+    by_order = {level.order_index: level for level in all_levels}
+    for level in levels:
+        previous = by_order.get(level.order_index - 1)
+        level.is_unlocked = (
+            level.order_index == 1
+            or previous is None
+            or completed.get(previous.id, 0) >= level.unlock_threshold
+        )
+    return levels
+
+
+def with_unlock_state(levels, user):
+    """
+    Set `is_unlocked` on each level for the given user, reading the
+    completed counts from `UserLevelStats` with a single query.
+    """
+    if user is None or not user.is_authenticated:
+        for level in levels:
+            level.is_unlocked = False
+        return levels
+
+    completed = dict(
+        UserLevelStats.objects.filter(user=user).values_list("level_id", "completed")
+    )
+    return _set_unlock_state(levels, completed, get_levels())
+
+
+async def awith_unlock_state(levels, user):
+    if user is None or not user.is_authenticated:
+        for level in levels:
+            level.is_unlocked = False
+        return levels
+
+    completed = {
+        level_id: count
+        async for level_id, count in UserLevelStats.objects.filter(
+            user=user
+        ).values_list("level_id", "completed")
+    }
+    return _set_unlock_state(levels, completed, await aget_levels())
+
+
+def with_user_progress(lessons, user):
+    """
+    Set `user_progress_rows` on each lesson, mirroring
+    `Lesson.objects.with_user_progress()` with a single query.
+    """
+    if user is None or not user.is_authenticated:
+        return lessons
+
+    progress = {
+        row.lesson_id: row
+        for row in UserProgress.objects.filter(
+            user=user, lesson_id__in=[lesson.id for lesson in lessons]
+        )
+    }
+    return _set_user_progress(lessons, progress)
+
+
+async def awith_user_progress(lessons, user):
+    if user is None or not user.is_authenticated:
+        return lessons
+
+    progress = {
+        row.lesson_id: row
+        async for row in UserProgress.objects.filter(
+            user=user, lesson_id__in=[lesson.id for lesson in lessons]
+        )
+    }
+    return _set_user_progress(lessons, progress)
+
+
+def _set_user_progress(lessons, progress):
+    """
+    `progress` maps lesson ids to the user's progress row.
+    """
+    for lesson in lessons:
+        row = progress.get(lesson.id)
+        lesson.user_progress_rows = [row] if row else []
+    return lessons
+
+
+def get_next_lesson(user):
+    """
+    The lesson to recommend to `user` next, with its progress attached, or
+    None once everything is done.
+
+    The last-accessed incomplete lesson wins; otherwise it is the first
+    incomplete lesson of the first unlocked active level. Costs one query
+    for the user's progress rows; the rest is a pass over the catalog.
+    """
+    progress = {row.lesson_id: row for row in UserProgress.objects.filter(user=user)}
+    return _next_lesson(progress, get_course_lessons(), get_levels())
+
+
+async def aget_next_lesson(user):
+    progress = {
+        row.lesson_id: row async for row in UserProgress.objects.filter(user=user)
+    }
+    return _next_lesson(progress, await aget_course_lessons(), await aget_levels())
+
+
+def _next_lesson(progress, course_lessons, all_levels):
+    lessons = {lesson.id: lesson for lesson in course_lessons}
+
+    def attach(lesson):
+        row = progress.get(lesson.id)
+        lesson.user_progress_rows = [row] if row else []
+        return lesson
+
+    in_progress = [
+        row
+        for row in progress.values()
+        if not row.is_completed and row.lesson_id in lessons
+    ]
+    if in_progress:
+        latest = max(in_progress, key=lambda row: row.last_accessed)
+        return attach(lessons[latest.lesson_id])
+
+    completed = _completed_counts(progress, lessons)
+
+    by_level = {}
+    for lesson in lessons.values():
+        by_level.setdefault(lesson.level_id, []).append(lesson)
+
+    active_levels = [level for level in all_levels if level.is_active]
+    for level in _set_unlock_state(active_levels, completed, all_levels):
+        if not level.is_unlocked:
+            continue
+        for lesson in by_level.get(level.id, []):
+            row = progress.get(lesson.id)
+            if row is None or not row.is_completed:
+                return attach(lesson)
+
+    return None
+
+
+def _completed_counts(progress, lessons):
+    """
+    Completed lessons per level id, counted from the user's progress rows
+    the way the `UserLevelStats` counters are; `get_next_lesson()` already
+    holds every row, so this saves it the counters query.
+    """
+    completed = {}
+    for row in progress.values():
+        if row.is_completed and row.lesson_id in lessons:
+            level_id = lessons[row.lesson_id].level_id
+            completed[level_id] = completed.get(level_id, 0) + 1
+    return completed
@@ -0,0 +1,167 @@
+"""
+Conditional GET support for the content endpoints.
+
+A content response depends only on the catalog (see `core.catalog`) and on the
+requesting user's progress. Both carry a nanosecond version stamp, so an ETag
+and Last-Modified can be derived from the cache alone and a matching
+`If-None-Match`/`If-Modified-Since` is answered with 304 before any query or
+serialization runs. Last-Modified is left out until the second it names has
+passed, since it can't tell apart two changes within one second.
+
+That is only correct while every server process reads the same versions: a
+process-local cache would let one worker answer 304 after another one
+recorded a change. `gunicorn.conf.py` refuses to start several workers on
+one, and `compose.yml` shares Redis between replicas.
+"""
+
+import hashlib
+import time
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import condition
+
+from . import catalog
+
+
+def _progress_key(user_id):
+    return f"progress:{user_id}:version"
+
+
+def get_progress_version(user):
+    if not user.is_authenticated:
+        return 0
+
+    key = _progress_key(user.pk)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_progress_version(user):
+    if not user.is_authenticated:
+        return 0
+
+    key = _progress_key(user.pk)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), None)
+        version = await cache.aget(key)
+    return version
+
+
+def bump_progress_version(user_id):
+    """
+    Called whenever the user's progress rows change.
+    """
+    key = _progress_key(user_id)
+    current = cache.get(key) or 0
+    cache.set(key, max(time.time_ns(), current + 1), None)
+
+
+def _as_datetime(version):
+    return datetime.fromtimestamp(version / 1e9, tz=timezone.utc)
+
+
+def _settled(modified):
+    """
+    `modified`, or None while its second is still running. Last-Modified
+    has whole seconds, so a change later in that second would not move it
+    and If-Modified-Since would still match; the ETag covers that second.
+    """
+    if modified is not None and int(modified.timestamp()) >= int(time.time()):
+        return None
+    return modified
+
+
+class ConditionalContentMixin:
+    """
+    Adds strong ETags and Last-Modified to GET/HEAD and short-circuits
+    matching conditional requests with 304 Not Modified.
+    """
+
+    def get_etag(self, request, *args, **kwargs):
+        return self._etag(
+            request, catalog.get_version(), get_progress_version(request.user)
+        )
+
+    def _etag(self, request, catalog_version, progress_version):
+        parts = (
+            request.get_full_path(),
+            request.META.get("HTTP_ACCEPT", ""),
+            catalog_version,
+            request.user.pk,
+            progress_version,
+        )
+        return hashlib.sha256(repr(parts).encode()).hexdigest()[:32]
+
+    def get_catalog_modified(self, request, *args, **kwargs):
+        return catalog.get_modified()
+
+    def get_last_modified(self, request, *args, **kwargs):
+        modified = self.get_catalog_modified(request, *args, **kwargs)
+        if modified is not None and request.user.is_authenticated:
+            modified = max(modified, _as_datetime(get_progress_version(request.user)))
+        return _settled(modified)
+
+    def get(self, request, *args, **kwargs):
+        view = condition(
+            etag_func=self.get_etag, last_modified_func=self.get_last_modified
+        )(super().get)
+        response = view(request, *args, **kwargs)
+        # Per-user payloads: shared caches must not store them, clients revalidate
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class AsyncConditionalContentMixin(ConditionalContentMixin):
+    """
+    `ConditionalContentMixin` for async views: the validators are computed
+    with the cache's async API, then `aprepare()` loads what the view's
+    `get_queryset()`/`get_object()` will return, so the inherited DRF
+    handler only serializes.
+    """
+
+    async def aget_etag(self, request, *args, **kwargs):
+        return self._etag(
+            request,
+            await catalog.aget_version(),
+            await aget_progress_version(request.user),
+        )
+
+    async def aget_catalog_modified(self, request, *args, **kwargs):
+        return await catalog.aget_modified()
+
+    async def aget_last_modified(self, request, *args, **kwargs):
+        modified = await self.aget_catalog_modified(request, *args, **kwargs)
+        if modified is not None and request.user.is_authenticated:
+            version = await aget_progress_version(request.user)
+            modified = max(modified, _as_datetime(version))
+        return _settled(modified)
+
+    async def aprepare(self, request, *args, **kwargs):
+        pass
+
+    async def get(self, request, *args, **kwargs):
+        # What condition() does for ConditionalContentMixin.get
+        etag = quote_etag(await self.aget_etag(request, *args, **kwargs))
+        modified = await self.aget_last_modified(request, *args, **kwargs)
+        modified = int(modified.timestamp()) if modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=modified)
+        if response is None:
+            await self.aprepare(request, *args, **kwargs)
+            # The DRF handler, skipping ConditionalContentMixin's sync checks
+            response = super(ConditionalContentMixin, self).get(
+                request, *args, **kwargs
+            )
+
+        if modified and not response.has_header("Last-Modified"):
+            response.headers["Last-Modified"] = http_date(modified)
+        response.headers.setdefault("ETag", etag)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
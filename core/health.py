@@ -0,0 +1,17 @@
+from django.db import DatabaseError, connection
+from django.http import JsonResponse
+
+
+def readiness(request):
+    """
+    Readiness probe: 200 once the default database answers a query, 503
+    while it doesn't. Replicas report ready as soon as they can serve, so
+    orchestration (see compose.yml) can route to them instead of the
+    container blocking on start-up until PostgreSQL is reachable.
+    """
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+    except DatabaseError:
+        return JsonResponse({"status": "unavailable"}, status=503)
+    return JsonResponse({"status": "ok"})
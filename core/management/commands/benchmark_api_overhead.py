@@ -0,0 +1,97 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils.module_loading import import_string
+from rest_framework.views import APIView
+
+from users.serializers import TokenObtainPairSerializer
+
+User = get_user_model()
+
+DEFAULT_PATHS = ['/content/levels/', '/content/progress/next/', '/content/progress/summary/']
+
+
+class Command(BaseCommand):
+    """
+    A Django management command comparing per-request overhead of the full
+    middleware/authentication stack against API mode (see `DJANGO_API_MODE`).
+
+    Both stacks serve the same authenticated requests in-process, so the
+    difference in median latency is what the skipped middleware and
+    authenticators cost. Runs inside a transaction that is rolled back.
+
+    Usage:
+    python manage.py benchmark_api_overhead
+    python manage.py benchmark_api_overhead --requests 2000 --path /content/levels/
+    """
+    help = 'Measures per-request overhead of the full stack versus API mode.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Timed requests per path and stack.')
+        parser.add_argument('--path', action='append', help='Path to request (repeatable).')
+
+    def handle(self, *args, **options):
+        paths = options['path'] or DEFAULT_PATHS
+        stacks = {
+            'full': (settings.FULL_MIDDLEWARE, settings.FULL_AUTHENTICATION_CLASSES),
+            'api': (settings.API_MIDDLEWARE, settings.API_AUTHENTICATION_CLASSES),
+        }
+
+        with transaction.atomic():
+            user = User.objects.create_user(
+                email='benchmark-api-overhead@example.com', is_active=True
+            )
+            access = str(TokenObtainPairSerializer.get_token(user).access_token)
+            timings = self._measure(stacks, paths, access, options['requests'])
+            transaction.set_rollback(True)
+
+        self.stdout.write(f'{"path":<36}{"full µs":>10}{"api µs":>10}{"saved µs":>10}{"saved":>8}')
+        for path in paths:
+            full, api = timings['full'][path], timings['api'][path]
+            self.stdout.write(
+                f'{path:<36}{full:>10.1f}{api:>10.1f}{full - api:>10.1f}{(full - api) / full:>8.1%}'
+            )
+
+    def _measure(self, stacks, paths, access, requests):
+        """
+        Median microseconds per request, as {stack: {path: median}}.
+
+        Each client keeps the middleware chain it was loaded with, so both
+        stacks can be driven side by side; requests alternate between them to spread any
+        drift (cache warm-up, CPU frequency) evenly.
+        """
+        clients = {}
+        authentication = {}
+        for name, (middleware, classes) in stacks.items():
+            clients[name] = Client(HTTP_AUTHORIZATION=f'Bearer {access}')
+            with override_settings(MIDDLEWARE=middleware):
+                clients[name].handler.load_middleware()
+            authentication[name] = [import_string(path) for path in classes]
+
+        samples = {name: {path: [] for path in paths} for name in stacks}
+        original = APIView.authentication_classes
+        try:
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                for i in range(requests + 10):
+                    for path in paths:
+                        for name, client in clients.items():
+                            APIView.authentication_classes = authentication[name]
+                            start = time.perf_counter()
+                            client.get(path)
+                            elapsed = time.perf_counter() - start
+                            # The first rounds only warm up caches
+                            if i >= 10:
+                                samples[name][path].append(elapsed)
+        finally:
+            APIView.authentication_classes = original
+
+        return {
+            name: {path: statistics.median(values) * 1e6 for path, values in by_path.items()}
+            for name, by_path in samples.items()
+        }
@@ -0,0 +1,101 @@
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Seconds from process start until a new replica answers its readiness probe
+TARGET_SECONDS = 2.0
+
+
+class Command(BaseCommand):
+    """
+    A Django management command measuring how long a new replica takes to
+    become ready: gunicorn is started with `gunicorn.conf.py` exactly as the
+    container starts it, and `/health/ready/` is polled until it answers 200.
+
+    Fails when the median start-up time exceeds the target, so it can gate
+    a release. `--no-bytecode` hides existing `.pyc` files from the server to
+    show what compiling every module from source on start costs.
+
+    Usage:
+    python manage.py benchmark_cold_start
+    python manage.py benchmark_cold_start --runs 10 --target 2 --no-bytecode
+    """
+    help = 'Measures the time from starting gunicorn until the readiness probe passes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help='Server starts to measure.')
+        parser.add_argument('--target', type=float, default=TARGET_SECONDS, help='Median start-up time allowed, in seconds.')
+        parser.add_argument('--timeout', type=float, default=60, help='Seconds to wait for a single start.')
+        parser.add_argument('--no-bytecode', action='store_true', help='Start without any precompiled bytecode.')
+
+    def handle(self, *args, **options):
+        timings = [
+            self._measure(options['timeout'], options['no_bytecode'])
+            for _ in range(options['runs'])
+        ]
+        median = statistics.median(timings)
+
+        self.stdout.write(
+            f'cold start: median {median:.2f}s, min {min(timings):.2f}s, '
+            f'max {max(timings):.2f}s over {len(timings)} runs (target {options["target"]:.2f}s)'
+        )
+        if median > options['target']:
+            raise CommandError(
+                f'Median cold start {median:.2f}s exceeds the {options["target"]:.2f}s target.'
+            )
+
+    def _measure(self, timeout, no_bytecode):
+        """Seconds until a freshly started server answers its readiness probe."""
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+
+        env = {
+            **os.environ,
+            'GUNICORN_BIND': f'127.0.0.1:{port}',
+            'GUNICORN_WORKERS': '1',
+            'DJANGO_ALLOWED_HOST': '127.0.0.1',
+        }
+        # Its own metrics directory: gunicorn empties it on start, and the
+        # default one may belong to a server that is running here
+        with tempfile.TemporaryDirectory() as pycache, tempfile.TemporaryDirectory() as metrics:
+            env['PROMETHEUS_MULTIPROC_DIR'] = metrics
+            if no_bytecode:
+                # An empty cache prefix that is never written to: every
+                # import compiles from source, as in an image without .pyc
+                env.update(PYTHONPYCACHEPREFIX=pycache, PYTHONDONTWRITEBYTECODE='1')
+
+            start = time.perf_counter()
+            server = subprocess.Popen(
+                [sys.executable, '-m', 'gunicorn'],
+                cwd=settings.BASE_DIR,
+                env=env,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            try:
+                return self._wait_until_ready(f'http://127.0.0.1:{port}/health/ready/', start, timeout, server)
+            finally:
+                server.terminate()
+                server.wait()
+
+    def _wait_until_ready(self, url, start, timeout, server):
+        while time.perf_counter() - start < timeout:
+            if server.poll() is not None:
+                raise CommandError(f'gunicorn exited with status {server.returncode} before becoming ready.')
+            try:
+                with urllib.request.urlopen(url, timeout=5) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                pass
+            time.sleep(0.01)
+        raise CommandError(f'{url} was not ready after {timeout:.0f}s.')
@@ -0,0 +1,341 @@
+import asyncio
+import json
+import math
+import random
+import re
+import subprocess
+import textwrap
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import Resolver404, resolve
+
+from core.models import Lesson, Level
+
+try:
+    import httpx
+except ImportError:  # A dev dependency, not installed in the image
+    httpx = None
+
+# The collection is written against the deployed /api/v1/ prefixes
+ROUTE_PREFIXES = {
+    '/api/v1/content/': '/content/',
+    '/api/v1/users/': '/accounts/',
+}
+
+# Relative request rates by Bruno request name; requests not listed aren't sent
+DEFAULT_WEIGHTS = {
+    'levels': 20,
+    'speicfic level': 2,
+    'lessons in level': 15,
+    'Single Lesson': 20,
+    'progress': 8,
+    'progress summary': 10,
+    'progress next': 15,
+    'bookmarked': 5,
+    'progress batch': 5,
+}
+
+# Path parameters are filled with ids of existing rows, by URL name
+PATH_PARAM_MODELS = {
+    'level-detail': Level,
+    'level-lessons': Level,
+    'lesson-detail': Lesson,
+    'progress-update': Lesson,
+}
+
+
+def parse_bru(text):
+    """
+    Parses a Bruno request file into {block name: content}. Key/value blocks
+    (`meta`, `get`, `params:path`, ...) become dicts; `body:*`, `script:*`
+    and `docs` blocks keep their raw text.
+    """
+    blocks = {}
+    for name, content in re.findall(r'^([\w:-]+) \{\n(.*?)^\}', text, re.M | re.S):
+        if name.startswith(('body:', 'script:', 'docs')):
+            blocks[name] = textwrap.dedent(content).strip()
+        else:
+            blocks[name] = dict(
+                (key.strip(), value.strip())
+                for key, _, value in (line.partition(':') for line in content.splitlines())
+                if key.strip()
+            )
+    return blocks
+
+
+@dataclass
+class Endpoint:
+    name: str
+    method: str
+    path: str
+    url_name: str
+    authenticated: bool
+    body: object = None
+    weight: int = 0
+
+    def build(self, ids, lesson_ids):
+        """
+        Returns a concrete (path, body) for one request, with path parameters
+        and the `lesson_id`/`client_ts` fields of batch records filled in.
+        """
+        path = self.path
+        model = PATH_PARAM_MODELS.get(self.url_name)
+        if model is not None:
+            path = re.sub(r'\{\w+\}', str(random.choice(ids[model])), path)
+
+        body = self.body
+        if isinstance(body, dict) and 'records' in body:
+            now = datetime.now(timezone.utc).isoformat()
+            body = {
+                **body,
+                'records': [
+                    {**record, 'lesson_id': random.choice(lesson_ids), 'client_ts': now}
+                    for record in body['records']
+                ],
+            }
+        return path, body
+
+
+def load_collection(directory):
+    """
+    Reads every HTTP request in a Bruno collection as {name: Endpoint},
+    with URLs rewritten to the routes this project serves.
+    """
+    endpoints = {}
+    for file in sorted(Path(directory).rglob('*.bru')):
+        blocks = parse_bru(file.read_text())
+        method = next((m for m in ('get', 'post', 'put', 'patch', 'delete') if m in blocks), None)
+        if method is None:
+            continue
+
+        name = blocks['meta']['name']
+        path = blocks[method]['url'].replace('{{BaseUrl}}', '')
+        for prefix, route in ROUTE_PREFIXES.items():
+            if path.startswith(prefix):
+                path = route + path[len(prefix):]
+        path = re.sub(r':(\w+)', r'{\1}', path)
+
+        url_name = None
+        for candidate in (path, path.rstrip('/') + '/'):
+            try:
+                url_name = resolve(re.sub(r'\{\w+\}', '1', candidate)).url_name
+            except Resolver404:
+                continue
+            path = candidate
+            break
+        if url_name is None:
+            continue
+
+        body = blocks.get('body:json') if blocks[method].get('body') == 'json' else None
+        endpoints[name] = Endpoint(
+            name=name,
+            method=method.upper(),
+            path=path,
+            url_name=url_name,
+            authenticated=blocks[method].get('auth') != 'none',
+            body=json.loads(body) if body else None,
+        )
+    return endpoints
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of a sorted list, None for an empty one."""
+    if not values:
+        return None
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+
+def milliseconds(seconds):
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+class Command(BaseCommand):
+    """
+    A Django management command load-testing a running server with the
+    requests described in the Bruno collection (`bruno/`).
+
+    Seeded users (`populate_db --users N` creates user1@example.com ...
+    userN@example.com) log in through the collection's Login request. Then
+    a weighted mix of content and progress requests is sent at a fixed
+    arrival rate with asyncio. Requests are scheduled independently of
+    responses, so a slow server shows up as latency rather than as a lower
+    request rate. Latency is measured from each request's scheduled start.
+
+    Path parameters and progress records use level and lesson ids read from
+    this project's database, which should be the one the server uses.
+
+    Prints a JSON report with p50/p95/p99 latency, throughput and status
+    counts per endpoint, tagged with the current commit. Requests are sent
+    with httpx over kept-alive connections; it is a dev dependency
+    (`uv sync --group dev`).
+
+    Usage:
+    python manage.py benchmark_load --rps 200 --duration 60
+    python manage.py benchmark_load --base-url http://127.0.0.1:8000 --users 100 --weight "Single Lesson=40" --output load.json
+    """
+    help = 'Load-tests a running server with the Bruno collection at a target request rate.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000', help='Server to load.')
+        parser.add_argument('--rps', type=float, default=50, help='Target requests per second.')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds to send requests for.')
+        parser.add_argument('--users', type=int, default=20, help='Seeded users to log in and spread requests over.')
+        parser.add_argument('--password', default='password123', help='Password of the seeded users.')
+        parser.add_argument('--concurrency', type=int, default=256, help='Maximum requests in flight.')
+        parser.add_argument('--weight', action='append', default=[], metavar='NAME=WEIGHT', help='Override a request weight (repeatable).')
+        parser.add_argument('--collection', default=settings.BASE_DIR / 'bruno', help='Bruno collection directory.')
+        parser.add_argument('--output', help='Also write the report to this file.')
+
+    def handle(self, *args, **options):
+        if httpx is None:
+            raise CommandError('benchmark_load needs httpx; install the dev dependencies (uv sync --group dev).')
+        if options['rps'] <= 0 or options['duration'] <= 0 or options['users'] < 1:
+            raise CommandError('--rps, --duration and --users must be positive.')
+        if options['rps'] * options['duration'] < 1:
+            raise CommandError('--rps times --duration must come to at least one request.')
+
+        endpoints = load_collection(options['collection'])
+        if 'Login' not in endpoints:
+            raise CommandError(f'No Login request found in {options["collection"]}.')
+        mix = self._mix(endpoints, options['weight'])
+
+        ids = {model: list(model.objects.values_list('pk', flat=True)) for model in (Level, Lesson)}
+        if not all(ids.values()):
+            raise CommandError('No levels or lessons found; run populate_db --users N first.')
+
+        report = asyncio.run(self._run(endpoints['Login'], mix, ids, options))
+        output = json.dumps(report, indent=2)
+        self.stdout.write(output)
+        if options['output']:
+            Path(options['output']).write_text(output + '\n')
+
+    def _mix(self, endpoints, overrides):
+        weights = dict(DEFAULT_WEIGHTS)
+        for override in overrides:
+            name, _, weight = override.rpartition('=')
+            if name not in endpoints or not weight.isdigit():
+                raise CommandError(f'Invalid --weight {override!r}; expected one of {sorted(endpoints)}=N.')
+            weights[name] = int(weight)
+
+        mix = []
+        for name, weight in weights.items():
+            if weight and name in endpoints:
+                endpoints[name].weight = weight
+                mix.append(endpoints[name])
+        if not mix:
+            raise CommandError('Every request has weight 0.')
+        return mix
+
+    async def _login(self, client, login, options):
+        async def token(n):
+            body = {**(login.body or {}), 'email': f'user{n}@example.com', 'password': options['password']}
+            response = await client.request(login.method, login.path, json=body)
+            if response.status_code != 200:
+                raise CommandError(
+                    f'Login as user{n}@example.com failed with status {response.status_code}.'
+                )
+            return response.json()['access']
+
+        return await asyncio.gather(*(token(n) for n in range(1, options['users'] + 1)))
+
+    async def _run(self, login, mix, ids, options):
+        # Kept-alive connections, so latency isn't inflated by a TCP handshake
+        # per request. No timeout: a slow response is a measurement too.
+        connections = options['concurrency']
+        client = httpx.AsyncClient(
+            base_url=options['base_url'],
+            headers={'Accept': 'application/json'},
+            limits=httpx.Limits(max_connections=connections, max_keepalive_connections=connections),
+            timeout=None,
+        )
+        async with client:
+            try:
+                tokens = await self._login(client, login, options)
+            except httpx.TransportError as e:
+                raise CommandError(f'Cannot reach {options["base_url"]}: {e}') from e
+            results = await self._drive(client, mix, ids, tokens, options)
+        return self._report(mix, results, options)
+
+    async def _drive(self, client, mix, ids, tokens, options):
+        """
+        Sends requests at the target rate for the duration and returns
+        ({name: [latency]}, {name: Counter(status)}, elapsed seconds).
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(options['concurrency'])
+        latencies = defaultdict(list)
+        statuses = defaultdict(Counter)
+        weights = [endpoint.weight for endpoint in mix]
+
+        async def send(endpoint, scheduled):
+            path, body = endpoint.build(ids, ids[Lesson])
+            headers = {}
+            if endpoint.authenticated:
+                headers['Authorization'] = f'Bearer {random.choice(tokens)}'
+            async with semaphore:
+                try:
+                    response = await client.request(endpoint.method, path, json=body, headers=headers)
+                    status = response.status_code
+                except httpx.TransportError:
+                    status = 'error'
+            latencies[endpoint.name].append(loop.time() - scheduled)
+            statuses[endpoint.name][str(status)] += 1
+
+        tasks = []
+        start = loop.time()
+        for i in range(int(options['rps'] * options['duration'])):
+            scheduled = start + i / options['rps']
+            await asyncio.sleep(max(0, scheduled - loop.time()))
+            endpoint = random.choices(mix, weights)[0]
+            tasks.append(asyncio.create_task(send(endpoint, scheduled)))
+        await asyncio.gather(*tasks)
+        return latencies, statuses, loop.time() - start
+
+    def _report(self, mix, results, options):
+        latencies, statuses, elapsed = results
+
+        def summary(values, counts):
+            values = sorted(values)
+            return {
+                'requests': len(values),
+                'throughput_rps': round(len(values) / elapsed, 2) if elapsed else 0,
+                'p50_ms': milliseconds(percentile(values, 50)),
+                'p95_ms': milliseconds(percentile(values, 95)),
+                'p99_ms': milliseconds(percentile(values, 99)),
+                'statuses': dict(sorted(counts.items())),
+            }
+
+        endpoints = {
+            endpoint.name: {
+                'method': endpoint.method,
+                'path': endpoint.path,
+                'weight': endpoint.weight,
+                **summary(latencies[endpoint.name], statuses[endpoint.name]),
+            }
+            for endpoint in mix
+            if latencies[endpoint.name]
+        }
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True
+            ).stdout.strip()
+        except OSError:
+            commit = ''
+
+        return {
+            'commit': commit or None,
+            'base_url': options['base_url'],
+            'target_rps': options['rps'],
+            'duration_s': round(elapsed, 2),
+            'users': options['users'],
+            'total': summary(
+                [value for values in latencies.values() for value in values],
+                sum(statuses.values(), Counter()),
+            ),
+            'endpoints': endpoints,
+        }
@@ -1,14 +1,23 @@
 import random
-from django.core.management.base import BaseCommand
-from django.db import transaction
+import time
+from itertools import batched
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
 from django.utils import timezone
-from core.models import Level, Lesson, UserProgress 
+from core import catalog
+from core.models import Level, Lesson, UserLevelStats, UserProgress 
 import lorem
 
 # Get the custom user model
 User = get_user_model()
 
+# PostgreSQL numbers the parameters of a statement with 16 bits; Django only
+# declares a limit (connection.features.max_query_params) for SQLite and Oracle
+MAX_QUERY_PARAMS = 65535
+
 class Command(BaseCommand):
     """
     A Django management command to populate the database with initial data.
@@ -16,27 +25,53 @@ class Command(BaseCommand):
     This command clears existing data for User, Level, Lesson, and UserProgress models
     and then creates a new set of sample data. This is useful for development
     and testing purposes to ensure a consistent database state.
+
+    Passing `--users` switches to scale mode, which generates a production-sized
+    dataset instead: users `user1@example.com` ... `userN@example.com` (all with
+    password `password123`), `--levels` levels of `--lessons-per-level` lessons,
+    and progress rows for `--progress-density` of the course on average, each
+    user working through it in order. Rows are inserted in chunks with
+    `bulk_create`, or with PostgreSQL `COPY` when `--copy` is given, and every
+    user shares one precomputed password hash. The same `--seed` generates
+    the same data.
     
     Usage:
     python manage.py populate_db
+    python manage.py populate_db --users 100000 --levels 50 --lessons-per-level 40 --progress-density 0.3 --seed 42
+    python manage.py populate_db --users 100000 --copy
     """
     help = 'Populates the database with initial data for levels, lessons, and users.'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, help='Generate this many users (scale mode) instead of the sample data.')
+        parser.add_argument('--levels', type=int, default=10, help='Levels to generate in scale mode.')
+        parser.add_argument('--lessons-per-level', type=int, default=20, help='Lessons per level in scale mode.')
+        parser.add_argument('--progress-density', type=float, default=0.3, help='Average fraction of the course each user has progressed through.')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for scale mode.')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk insert in scale mode, within the database parameter limit.')
+        parser.add_argument('--copy', action='store_true', help='Load rows with PostgreSQL COPY instead of bulk_create.')
+
     @transaction.atomic
-    def handle(self, *args, **kwargs):
+    def handle(self, *args, **options):
         """
         Main logic for the management command.
         
         Wraps the entire data creation process in a single database transaction.
         If any part of the script fails, all changes will be rolled back.
         """
+        if options['users'] is not None:
+            self._validate_scale_options(options)
+
         self.stdout.write(self.style.WARNING('Clearing existing data...'))
         self._clear_data()
         
         self.stdout.write(self.style.SUCCESS('Creating new data...'))
-        self._create_users()
-        self._create_levels_and_lessons()
-        self._create_user_progress()
+        if options['users'] is not None:
+            self._create_scale_data(options)
+        else:
+            self._create_users()
+            self._create_levels_and_lessons()
+            self._create_user_progress()
         
         self.stdout.write(self.style.SUCCESS('Database populated successfully!'))
 
@@ -45,10 +80,13 @@ class Command(BaseCommand):
         Deletes all existing records from User, Level, and UserProgress models.
         Lesson records are deleted via cascading from Level.
         """
+        # Progress and counters first: they are plain DELETEs, whereas
+        # cascading from users would collect every row in Python
+        UserProgress.objects.all().delete()
+        UserLevelStats.objects.all().delete()
         User.objects.all().delete()
         Level.objects.all().delete()
         Lesson.objects.all().delete()
-        UserProgress.objects.all().delete()
         self.stdout.write(self.style.SUCCESS('Data cleared.'))
 
     def _create_users(self):
@@ -218,4 +256,168 @@ class Command(BaseCommand):
 
 
         UserProgress.objects.bulk_create(progress_records)
-        self.stdout.write(self.style.SUCCESS(f'Created {len(progress_records)} user progress records.'))
\ No newline at end of file
+        self.stdout.write(self.style.SUCCESS(f'Created {len(progress_records)} user progress records.'))
+
+        # bulk_create bypasses UserProgressView, so recount the level counters
+        UserLevelStats.objects.rebuild()
+
+    def _validate_scale_options(self, options):
+        for name in ('users', 'levels', 'lessons_per_level', 'batch_size'):
+            if options[name] < 1:
+                raise CommandError(f'--{name.replace("_", "-")} must be at least 1.')
+        if not 0 <= options['progress_density'] <= 1:
+            raise CommandError('--progress-density must be between 0 and 1.')
+        if options['copy'] and connection.vendor != 'postgresql':
+            raise CommandError('--copy needs a PostgreSQL database.')
+
+    def _create_scale_data(self, options):
+        """
+        Generates the scale-mode dataset and brings the derived state (the
+        catalog cache version and the level counters) in line with it, since
+        bulk inserts skip the signals and views that maintain them.
+        """
+        random.seed(options['seed'])
+        self.batch_size = options['batch_size']
+        self.use_copy = options['copy']
+
+        user_ids = self._timed('users', self._bulk_users, options['users'])
+        lesson_ids = self._timed(
+            'lessons', self._bulk_levels_and_lessons, options['levels'], options['lessons_per_level']
+        )
+        self._timed('user progress records', self._bulk_user_progress, user_ids, lesson_ids, options['progress_density'])
+
+        catalog.bump_version()
+        transaction.on_commit(catalog.bump_version)
+        self._timed('level counter rows', UserLevelStats.objects.rebuild)
+
+    def _timed(self, label, create, *args):
+        start = time.perf_counter()
+        result = create(*args)
+        count = result if isinstance(result, int) else len(result)
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {count} {label} in {time.perf_counter() - start:.1f}s.'
+        ))
+        return result
+
+    def _bulk_users(self, count):
+        """
+        Inserts `count` active users sharing one precomputed password hash
+        and returns their ids in creation order.
+        """
+        password = make_password('password123')
+        first_names = ['Alice', 'Bob', 'Charlie', 'Dana', 'Eli', 'Farah', 'Hussein', 'Mona']
+        last_names = ['Summers', 'Mukhtar', 'Rivers', 'Stone', 'Hale']
+        User.objects.bulk_create(
+            (
+                User(
+                    email=f'user{i}@example.com',
+                    password=password,
+                    first_name=random.choice(first_names),
+                    last_name=random.choice(last_names),
+                    is_active=True,
+                )
+                for i in range(1, count + 1)
+            ),
+            batch_size=self._rows_per_statement(len(User._meta.concrete_fields)),
+        )
+        return list(User.objects.order_by('pk').values_list('pk', flat=True))
+
+    def _bulk_levels_and_lessons(self, levels, lessons_per_level):
+        """
+        Inserts the course and returns every lesson id in course order.
+        """
+        Level.objects.bulk_create(
+            Level(
+                title=f'Level {order}',
+                description=lorem.sentence(),
+                order_index=order,
+                unlock_threshold=0 if order == 1 else random.randint(1, max(1, lessons_per_level // 2)),
+            )
+            for order in range(1, levels + 1)
+        )
+        level_ids = Level.objects.order_by('order_index').values_list('pk', flat=True)
+
+        content_types = [choice for choice, _ in Lesson.CONTENT_TYPE_CHOICES]
+        lessons = []
+        for level_number, level_id in enumerate(level_ids, 1):
+            for order in range(1, lessons_per_level + 1):
+                content_type = random.choice(content_types)
+                lessons.append(Lesson(
+                    level_id=level_id,
+                    title=f'Lesson {level_number}.{order}',
+                    content=lorem.paragraph(),
+                    duration=random.randint(5, 30),
+                    order_index=order,
+                    content_type=content_type,
+                    video=f'http://example.com/video{level_number}-{order}' if content_type == 'video' else None,
+                ))
+        Lesson.objects.bulk_create(
+            lessons, batch_size=self._rows_per_statement(len(Lesson._meta.concrete_fields))
+        )
+        return list(Lesson.objects.values_list('pk', flat=True))
+
+    def _bulk_user_progress(self, user_ids, lesson_ids, density):
+        """
+        Gives each user progress on the first lessons of the course: how far
+        they got is binomially distributed around `density` of the course,
+        with every lesson before the furthest one completed. Returns the
+        number of rows inserted.
+
+        This table holds nearly all the rows, so it skips model instances
+        (building and preparing them costs more than inserting the rows) and
+        inserts value tuples prepared once for the database.
+        """
+        now = UserProgress._meta.get_field('changed_at').get_db_prep_save(timezone.now(), connection)
+        fields = ['user', 'lesson', 'is_completed', 'completed_at', 'bookmarked', 'changed_at', 'last_accessed']
+        created = 0
+
+        def rows():
+            nonlocal created
+            for user_id in user_ids:
+                reached = random.binomialvariate(len(lesson_ids), density)
+                created += reached
+                for i, lesson_id in enumerate(lesson_ids[:reached], 1):
+                    completed = i < reached
+                    yield (
+                        user_id,
+                        lesson_id,
+                        completed,
+                        now if completed else None,
+                        random.random() < 0.05,
+                        now,
+                        now,
+                    )
+
+        self._insert_rows(UserProgress, fields, rows())
+        return created
+
+    def _rows_per_statement(self, columns):
+        """
+        `--batch-size`, lowered so that a multi-row INSERT of `columns`
+        values per row stays within the database's parameter limit.
+        """
+        limit = connection.features.max_query_params or MAX_QUERY_PARAMS
+        return max(1, min(self.batch_size, limit // columns))
+
+    def _insert_rows(self, model, fields, rows):
+        """
+        Inserts tuples of database-ready values for `fields` into the model's
+        table, with `COPY` or with one multi-row statement per `batch_size` rows.
+        """
+        qn = connection.ops.quote_name
+        table = qn(model._meta.db_table)
+        columns = ', '.join(qn(model._meta.get_field(name).column) for name in fields)
+
+        with connection.cursor() as cursor:
+            if self.use_copy:
+                with cursor.copy(f'COPY {table} ({columns}) FROM STDIN') as copy:
+                    for row in rows:
+                        copy.write_row(row)
+                return
+
+            placeholders = f'({", ".join(["%s"] * len(fields))})'
+            for batch in batched(rows, self._rows_per_statement(len(fields))):
+                cursor.execute(
+                    f'INSERT INTO {table} ({columns}) VALUES {", ".join([placeholders] * len(batch))}',
+                    [value for row in batch for value in row],
+                )
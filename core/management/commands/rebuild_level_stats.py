@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.models import UserLevelStats
+
+
+class Command(BaseCommand):
+    """
+    A Django management command to rebuild or audit the `UserLevelStats` counters.
+
+    The counters are kept in step as progress changes (see `core.signals`), but
+    bulk loads and raw SQL bypass that. This command recounts them from
+    `UserProgress`.
+
+    Usage:
+    python manage.py rebuild_level_stats
+    python manage.py rebuild_level_stats --check
+    """
+    help = 'Rebuilds per-user, per-level progress counters from UserProgress.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report drift between the counters and UserProgress; fail if any is found.',
+        )
+
+    def handle(self, *args, **options):
+        if options['check']:
+            drifted = self._find_drift()
+            if drifted:
+                for (user_id, level_id), expected, actual in drifted[:20]:
+                    self.stdout.write(
+                        f'user={user_id} level={level_id} expected={expected} actual={actual}'
+                    )
+                raise CommandError(f'{len(drifted)} counter rows have drifted.')
+            self.stdout.write(self.style.SUCCESS('Counters are in sync.'))
+            return
+
+        written = UserLevelStats.objects.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} counter rows.'))
+
+    def _find_drift(self):
+        """
+        Compare stored counters against a fresh recount.
+        Returns a list of ((user_id, level_id), expected, actual) tuples.
+        """
+        expected = {
+            (row['user'], row['lesson__level']): (row['completed'], row['bookmarked'])
+            for row in UserLevelStats.objects.computed()
+        }
+        actual = {
+            (row['user'], row['level']): (row['completed'], row['bookmarked'])
+            for row in UserLevelStats.objects.values('user', 'level', 'completed', 'bookmarked')
+        }
+
+        drifted = []
+        for key in expected.keys() | actual.keys():
+            want = expected.get(key, (0, 0))
+            have = actual.get(key, (0, 0))
+            if want != have:
+                drifted.append((key, want, have))
+        return sorted(drifted)
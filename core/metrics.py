@@ -0,0 +1,135 @@
+"""
+Prometheus metrics, served at `/metrics` in the text exposition format.
+
+`TimingMiddleware` reports every request here, labelled with its URL name
+(`level-list`, `progress-update`, `token_obtain_pair`, ...). Cache hit
+ratios and the email outbox depth are computed when `/metrics` is scraped.
+
+Under gunicorn, `gunicorn.conf.py` sets `PROMETHEUS_MULTIPROC_DIR`: every
+worker keeps its values in memory-mapped files there, and the worker that
+answers a scrape adds up the files of all of them. Without it (runserver,
+tests) the values live in the current process.
+
+The endpoint shares the public port, so it only answers requests carrying
+`settings.METRICS_TOKEN` as a bearer token, and is not served at all
+without one.
+"""
+
+import os
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector
+
+from users.models import OutgoingEmail
+
+# Label for requests that matched no URL pattern
+UNMATCHED = "unmatched"
+
+registry = CollectorRegistry()
+
+REQUESTS = Counter(
+    "http_requests",
+    "Requests handled, by URL name, method and response status.",
+    ["url_name", "method", "status"],
+    registry=registry,
+)
+LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time from the first middleware until the response, by URL name and method.",
+    ["url_name", "method"],
+    registry=registry,
+)
+DB_QUERIES = Counter(
+    "db_queries",
+    "Database queries run while handling requests, by URL name.",
+    ["url_name"],
+    registry=registry,
+)
+CACHE_LOOKUPS = Counter(
+    "cache_lookups",
+    "Cache keys read while handling requests, by URL name and result (hit or miss).",
+    ["url_name", "result"],
+    registry=registry,
+)
+
+
+def observe_request(request, response, timings, duration):
+    match = getattr(request, "resolver_match", None)
+    url_name = (match.url_name if match else None) or UNMATCHED
+
+    REQUESTS.labels(url_name, request.method, response.status_code).inc()
+    LATENCY.labels(url_name, request.method).observe(duration)
+    DB_QUERIES.labels(url_name).inc(len(timings.queries))
+    if timings.cache_hits:
+        CACHE_LOOKUPS.labels(url_name, "hit").inc(timings.cache_hits)
+    if timings.cache_misses:
+        CACHE_LOOKUPS.labels(url_name, "miss").inc(timings.cache_misses)
+
+
+class ScrapeCollector:
+    """
+    The request metrics of all workers, the cache hit ratio derived from
+    them and the gauges read from the database on every scrape.
+    """
+
+    def __init__(self, source):
+        self.source = source
+
+    def collect(self):
+        lookups = {}
+        for family in self.source.collect():
+            yield family
+            if family.name == "cache_lookups":
+                for sample in family.samples:
+                    if sample.name.endswith("_total"):
+                        counts = lookups.setdefault(sample.labels["url_name"], {})
+                        counts[sample.labels["result"]] = sample.value
+
+        ratio = GaugeMetricFamily(
+            "cache_hit_ratio",
+            "Share of cache keys read that were found, by URL name, since the server started.",
+            labels=["url_name"],
+        )
+        for url_name, counts in sorted(lookups.items()):
+            hits, misses = counts.get("hit", 0), counts.get("miss", 0)
+            ratio.add_metric([url_name], hits / (hits + misses))
+        yield ratio
+
+        # A scrape should still answer when the database doesn't
+        try:
+            pending = OutgoingEmail.objects.filter(status=OutgoingEmail.PENDING).count()
+        except DatabaseError:
+            return
+        yield GaugeMetricFamily(
+            "email_outbox_pending",
+            "Queued emails not delivered yet (see send_queued_mail).",
+            value=pending,
+        )
+
+
+def metrics(request):
+    if not settings.METRICS_TOKEN:
+        raise Http404
+    authorization = request.headers.get("Authorization", "")
+    if not constant_time_compare(authorization, f"Bearer {settings.METRICS_TOKEN}"):
+        return HttpResponseForbidden()
+
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        source = CollectorRegistry()
+        MultiProcessCollector(source)
+    else:
+        source = registry
+    return HttpResponse(
+        generate_latest(ScrapeCollector(source)), content_type=CONTENT_TYPE_LATEST
+    )
@@ -0,0 +1,214 @@
+import json
+import logging
+
+from asgiref.sync import (
+    async_to_sync,
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async,
+)
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from . import metrics, timing
+
+logger = logging.getLogger("core.timing")
+slow_logger = logging.getLogger("core.timing.slow")
+
+
+def _adapt(method, method_is_async, is_async):
+    """`BaseHandler.adapt_method_mode()`: make `method` sync or async."""
+    if method_is_async is None:
+        method_is_async = iscoroutinefunction(method)
+    if is_async and not method_is_async:
+        return sync_to_async(method, thread_sensitive=True)
+    if not is_async and method_is_async:
+        return async_to_sync(method)
+    return method
+
+
+class BrowserOnlyMiddleware:
+    """
+    Runs `settings.BROWSER_MIDDLEWARE` for every request outside
+    `settings.API_PATH_PREFIXES` and skips it for API requests.
+
+    The wrapped middleware is chained exactly as if it were listed in
+    `MIDDLEWARE` at this position, including its `process_view` and
+    `process_exception` hooks, so the admin keeps sessions, CSRF, messages
+    and clickjacking protection while JWT-only API calls don't pay for them.
+
+    Sync and async capable, so under ASGI API requests reach async views
+    without a thread switch; only browser requests pay for adapting the
+    wrapped middleware, as they would in `MIDDLEWARE`.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+            self.process_view = self.aprocess_view
+        self.view_hooks = []
+        self.exception_hooks = []
+
+        # Chained and adapted like BaseHandler.load_middleware()
+        handler, handler_is_async = get_response, self.is_async
+        for path in reversed(settings.BROWSER_MIDDLEWARE):
+            factory = import_string(path)
+            if not handler_is_async and getattr(factory, "sync_capable", True):
+                middleware_is_async = False
+            else:
+                middleware_is_async = getattr(factory, "async_capable", False)
+            handler = _adapt(handler, handler_is_async, middleware_is_async)
+            middleware = factory(handler)
+            if hasattr(middleware, "process_view"):
+                self.view_hooks.insert(0, _adapt(middleware.process_view, None, self.is_async))
+            if hasattr(middleware, "process_exception"):
+                # Exception middleware is always sync in Django
+                self.exception_hooks.append(_adapt(middleware.process_exception, None, False))
+            handler, handler_is_async = middleware, middleware_is_async
+        self.browser_handler = _adapt(handler, handler_is_async, self.is_async)
+
+    def is_api(self, request):
+        return request.path_info.startswith(settings.API_PATH_PREFIXES)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if self.is_api(request):
+            return self.get_response(request)
+        return self.browser_handler(request)
+
+    async def __acall__(self, request):
+        if self.is_api(request):
+            return await self.get_response(request)
+        return await self.browser_handler(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if self.is_api(request):
+            return None
+        for hook in self.view_hooks:
+            response = hook(request, view_func, view_args, view_kwargs)
+            if response is not None:
+                return response
+        return None
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        if self.is_api(request):
+            return None
+        for hook in self.view_hooks:
+            response = await hook(request, view_func, view_args, view_kwargs)
+            if response is not None:
+                return response
+        return None
+
+    def process_exception(self, request, exception):
+        if self.is_api(request):
+            return None
+        for hook in self.exception_hooks:
+            response = hook(request, exception)
+            if response is not None:
+                return response
+        return None
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+class TimingMiddleware:
+    """
+    Measures every request: total time, time and number of database
+    queries, time spent in serializers and cache hits/misses (see
+    `core.timing`).
+
+    The numbers are sent back in a `Server-Timing` header, logged as one
+    JSON line on the `core.timing` logger and added to the Prometheus
+    metrics in `core.metrics`. Requests slower than
+    `settings.SLOW_REQUEST_MS`, with all their queries, and single queries
+    slower than `settings.SLOW_QUERY_MS` are logged as warnings on
+    `core.timing.slow`, together with the view that handled them.
+
+    Works in sync and async stacks; list it first in `MIDDLEWARE` so the
+    total includes the other middleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with timing.collect() as timings:
+            response = self.get_response(request)
+        self.report(request, response, timings)
+        return response
+
+    async def __acall__(self, request):
+        with timing.collect() as timings:
+            response = await self.get_response(request)
+        self.report(request, response, timings)
+        return response
+
+    @staticmethod
+    def view_name(request):
+        match = getattr(request, "resolver_match", None)
+        if match is None:
+            return None
+        return getattr(match.func, "view_class", match.func).__name__
+
+    def report(self, request, response, timings):
+        total = timings.elapsed()
+        view = self.view_name(request)
+        queries = len(timings.queries)
+        metrics.observe_request(request, response, timings, total)
+
+        response.headers["Server-Timing"] = ", ".join([
+            f"total;dur={_ms(total)}",
+            f'db;dur={_ms(timings.db)};desc="{queries} queries"',
+            f"serializer;dur={_ms(timings.serializer)}",
+            f'cache;desc="hits={timings.cache_hits} misses={timings.cache_misses}"',
+        ])
+
+        request_line = {
+            "method": request.method,
+            "path": request.path,
+            "view": view,
+            "status": response.status_code,
+            "total_ms": _ms(total),
+        }
+        logger.info(json.dumps({
+            **request_line,
+            "db_ms": _ms(timings.db),
+            "queries": queries,
+            "serializer_ms": _ms(timings.serializer),
+            "cache_hits": timings.cache_hits,
+            "cache_misses": timings.cache_misses,
+        }))
+
+        for sql, duration in timings.queries:
+            if _ms(duration) >= settings.SLOW_QUERY_MS:
+                slow_logger.warning(json.dumps({
+                    "slow": "query",
+                    "view": view,
+                    "path": request.path,
+                    "ms": _ms(duration),
+                    "sql": sql,
+                }))
+        if _ms(total) >= settings.SLOW_REQUEST_MS:
+            slow_logger.warning(json.dumps({
+                "slow": "request",
+                **request_line,
+                "queries": [
+                    {"ms": _ms(duration), "sql": sql} for sql, duration in timings.queries
+                ],
+            }))
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.3 on 2026-10-16 23:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_stats(apps, schema_editor):
+    UserProgress = apps.get_model("core", "UserProgress")
+    UserLevelStats = apps.get_model("core", "UserLevelStats")
+
+    rows = (
+        UserProgress.objects.order_by()
+        .values("user", "lesson__level")
+        .annotate(
+            completed=Count("pk", filter=Q(is_completed=True)),
+            bookmarked=Count("pk", filter=Q(bookmarked=True)),
+        )
+    )
+    UserLevelStats.objects.bulk_create(
+        UserLevelStats(
+            user_id=row["user"],
+            level_id=row["lesson__level"],
+            completed=row["completed"],
+            bookmarked=row["bookmarked"],
+        )
+        for row in rows
+        if row["completed"] or row["bookmarked"]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0005_rename_video_link_lesson_video"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserLevelStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("completed", models.PositiveIntegerField(default=0)),
+                ("bookmarked", models.PositiveIntegerField(default=0)),
+                (
+                    "level",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="stats",
+                        to="core.level",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "User Level Stats",
+                "unique_together": {("user", "level")},
+            },
+        ),
+        migrations.RunPython(populate_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.3 on 2026-10-16 23:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_userlevelstats"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="userprogress",
+            name="user",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="userprogress",
+            index=models.Index(
+                condition=models.Q(("is_completed", False)),
+                fields=["user", "-last_accessed"],
+                name="progress_recent_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="userprogress",
+            index=models.Index(
+                condition=models.Q(("is_completed", True)),
+                fields=["user", "lesson"],
+                name="progress_completed_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="userprogress",
+            index=models.Index(
+                condition=models.Q(("bookmarked", True)),
+                fields=["user", "lesson"],
+                name="progress_bookmarked_idx",
+            ),
+        ),
+    ]
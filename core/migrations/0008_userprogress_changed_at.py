@@ -0,0 +1,22 @@
+# Generated by Django 5.2.3 on 2026-10-17 00:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_userprogress_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userprogress",
+            name="changed_at",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="Time of the last change, by the client's clock for synced writes",
+                null=True,
+            ),
+        ),
+    ]
@@ -1,10 +1,47 @@
-from django.db import models
+from django.db import connections, models, transaction
+from django.db.models import (
+    Case,
+    Count,
+    F,
+    OuterRef,
+    Prefetch,
+    Q,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 # Create your models here.
 
 
+class LevelQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(is_active=True).order_by("order_index")
+
+    def with_progress(self, user):
+        """
+        Annotate every level with the user's `completed` lesson count, its
+        `total` lesson count and the integer completion `percentage`.
+        """
+        completed = UserLevelStats.objects.filter(
+            user=user, level=OuterRef("pk")
+        ).values("completed")[:1]
+
+        return self.annotate(
+            completed=Coalesce(Subquery(completed), 0),
+            total=Count("lessons"),
+            percentage=Case(
+                When(total=0, then=Value(0)),
+                default=F("completed") * 100 / F("total"),
+                output_field=models.IntegerField(),
+            ),
+        )
+
+
 class Level(models.Model):
     title = models.CharField(
         max_length=100, help_text="Level title (e.g. 'Beginner', 'Intermediate')"
@@ -22,6 +59,9 @@ class Level(models.Model):
         default=0,
         help_text="Minimum completed lessons from previous level to unlock"
     )
+
+    objects = LevelQuerySet.as_manager()
+
     class Meta:
         db_table = "level"
         ordering = ["order_index"]
@@ -39,25 +79,41 @@ class Level(models.Model):
     def is_level_unlocked(self, user):
         """
         Determine if this level is unlocked for a given user
-        based on progress in previous levels
+        based on progress in previous levels.
+
+        Prefer `catalog.with_unlock_state(levels, user)` when handling more
+        than one level; this helper costs a query per call.
         """
         if self.order_index == 1:
             return True
-        
-        # Get the previous level
-        try:
-            prev_level = Level.objects.get(order_index=self.order_index - 1)
-        except Level.DoesNotExist:
-            return True
-        
-        # Check if user has met the unlock threshold
-        completed_in_prev = UserProgress.objects.filter(
-            user=user,
-            lesson__level=prev_level,
-            is_completed=True
-        ).count()
-        
-        return completed_in_prev >= self.unlock_threshold
+
+        from . import catalog
+
+        return catalog.with_unlock_state([self], user)[0].is_unlocked
+
+class LessonQuerySet(models.QuerySet):
+    def summaries(self):
+        """
+        Lessons without their (potentially large) content body.
+        """
+        return self.defer("content")
+
+    def with_user_progress(self, user):
+        """
+        Prefetch the given user's progress rows into `user_progress_rows`,
+        resolving progress for the whole result set in one extra query.
+        """
+        if user is None or not user.is_authenticated:
+            return self
+
+        return self.prefetch_related(
+            Prefetch(
+                "userprogress_set",
+                queryset=UserProgress.objects.filter(user=user),
+                to_attr="user_progress_rows",
+            )
+        )
+
 
 class Lesson(models.Model):
     CONTENT_TYPE_CHOICES = [
@@ -90,6 +146,8 @@ class Lesson(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = LessonQuerySet.as_manager()
+
     class Meta:
         ordering = ["level__order_index", "order_index"]
         unique_together = [("level", "order_index")]
@@ -114,18 +172,318 @@ class Lesson(models.Model):
                 {"order_index": _("This order position already exists in this level")}
             )
 
+class UserProgressQuerySet(models.QuerySet):
+    def upsert(self, user, lesson_id, **values):
+        """
+        Create or update the user's progress row for a lesson, returning
+        `(row, was_completed, was_bookmarked)`.
+
+        On PostgreSQL this is one INSERT ... ON CONFLICT DO UPDATE that locks
+        and reports the previous flags in the same statement. Elsewhere the
+        row is locked and updated within the caller's transaction.
+
+        Neither path sends `post_save` for the update: the caller adjusts
+        `UserLevelStats` by the returned flags itself (see `core.signals`).
+        """
+        # Raw SQL skips auto_now, so set it on both paths
+        values["last_accessed"] = timezone.now()
+        connection = connections[self.db]
+        if connection.vendor == "postgresql":
+            return self._upsert_returning(connection, user, lesson_id, values)
+
+        row, _ = self.select_for_update().get_or_create(user=user, lesson_id=lesson_id)
+        was_completed, was_bookmarked = row.is_completed, row.bookmarked
+        for name, value in values.items():
+            setattr(row, name, value)
+        self.filter(pk=row.pk).update(**values)
+        return row, was_completed, was_bookmarked
+
+    def _upsert_returning(self, connection, user, lesson_id, values):
+        opts = self.model._meta
+        qn = connection.ops.quote_name
+        table = qn(opts.db_table)
+
+        inserted = {
+            "user_id": user.pk,
+            "lesson_id": lesson_id,
+            "is_completed": False,
+            "bookmarked": False,
+            **values,
+        }
+        insert_fields = [opts.get_field(name) for name in inserted]
+        returned = opts.concrete_fields
+
+        # `previous` is read (and locked) by the INSERT's source, before the
+        # upsert runs, so it holds the pre-update flags even under contention.
+        # A row created concurrently after that read is left untouched (the
+        # WHERE below) and the statement is re-run with the row now visible.
+        sql = f"""
+            WITH previous AS MATERIALIZED (
+                SELECT {qn("is_completed")}, {qn("bookmarked")} FROM {table}
+                WHERE {qn("user_id")} = %s AND {qn("lesson_id")} = %s
+                FOR UPDATE
+            )
+            INSERT INTO {table} ({", ".join(qn(f.column) for f in insert_fields)})
+            SELECT {", ".join(["%s"] * len(insert_fields))}
+            FROM (SELECT count(*) FROM previous) AS locked
+            ON CONFLICT ({qn("user_id")}, {qn("lesson_id")}) DO UPDATE SET
+                {", ".join(
+                    f"{qn(opts.get_field(name).column)} = EXCLUDED.{qn(opts.get_field(name).column)}"
+                    for name in values
+                )}
+            WHERE EXISTS (SELECT 1 FROM previous)
+            RETURNING {", ".join(qn(f.column) for f in returned)},
+                (SELECT {qn("is_completed")} FROM previous),
+                (SELECT {qn("bookmarked")} FROM previous)
+        """
+        params = [user.pk, lesson_id] + [
+            field.get_db_prep_save(inserted[name], connection)
+            for name, field in zip(inserted, insert_fields)
+        ]
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            result = cursor.fetchone()
+            if result is None:
+                cursor.execute(sql, params)
+                result = cursor.fetchone()
+        *row, was_completed, was_bookmarked = result
+
+        progress = self.model.from_db(self.db, [f.attname for f in returned], row)
+        return progress, bool(was_completed), bool(was_bookmarked)
+
+    @transaction.atomic
+    def sync(self, user, records):
+        """
+        Apply a batch of offline progress records for `user` with one upsert.
+
+        Each record holds `lesson_id`, `client_ts` and optionally
+        `is_completed` and `bookmarked`. A record only applies if its
+        `client_ts` is not older than the row's `changed_at` (last writer
+        wins). A `client_ts` in the future counts as now, so a device with a
+        fast clock can't outrank every later change. Returns one
+        `(record, status, progress)` tuple per record, where status is
+        "applied", "stale" or "not_found".
+        """
+        now = timezone.now()
+        lesson_ids = {record["lesson_id"] for record in records}
+        levels = dict(
+            Lesson.objects.filter(pk__in=lesson_ids).values_list("id", "level_id")
+        )
+        # A row that doesn't exist can't be locked, so create the missing ones
+        # first. A batch creating the same row concurrently waits on the
+        # insert and then reads this batch's flags, not (False, False).
+        self.bulk_create(
+            [self.model(user=user, lesson_id=lesson_id) for lesson_id in levels],
+            ignore_conflicts=True,
+        )
+        current = {
+            row.lesson_id: row
+            for row in self.select_for_update().filter(user=user, lesson_id__in=levels)
+        }
+        before = {
+            lesson_id: (row.is_completed, row.bookmarked)
+            for lesson_id, row in current.items()
+        }
+
+        results = []
+        changed = {}
+        for record in records:
+            lesson_id = record["lesson_id"]
+            if lesson_id not in levels:
+                results.append((record, "not_found", None))
+                continue
+
+            client_ts = min(record["client_ts"], now)
+            row = current[lesson_id]
+            if row.changed_at and client_ts < row.changed_at:
+                results.append((record, "stale", row))
+                continue
+
+            if record.get("is_completed") and not row.is_completed:
+                row.completed_at = client_ts
+            row.is_completed = record.get("is_completed", row.is_completed)
+            row.bookmarked = record.get("bookmarked", row.bookmarked)
+            row.changed_at = client_ts
+            changed[lesson_id] = row
+            results.append((record, "applied", row))
+
+        # Rows conflict on (user, lesson) only; a known pk would be a second target
+        for row in changed.values():
+            row.pk = None
+        if changed:
+            self.bulk_create(
+                changed.values(),
+                update_conflicts=True,
+                unique_fields=["user", "lesson"],
+                update_fields=[
+                    "is_completed",
+                    "completed_at",
+                    "bookmarked",
+                    "changed_at",
+                    "last_accessed",
+                ],
+            )
+
+        deltas = {}
+        for lesson_id, row in changed.items():
+            was_completed, was_bookmarked = before.get(lesson_id, (False, False))
+            completed, bookmarked = deltas.get(levels[lesson_id], (0, 0))
+            deltas[levels[lesson_id]] = (
+                completed + row.is_completed - was_completed,
+                bookmarked + row.bookmarked - was_bookmarked,
+            )
+        for level_id, (completed, bookmarked) in deltas.items():
+            UserLevelStats.objects.bump(user, level_id, completed, bookmarked)
+
+        return results
+
+
 class UserProgress(models.Model):
-    user = models.ForeignKey("users.User", on_delete=models.CASCADE)
+    # Lookups by user are served by the (user, lesson) unique index
+    user = models.ForeignKey("users.User", on_delete=models.CASCADE, db_index=False)
     lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE)
     is_completed = models.BooleanField(default=False)
     completed_at = models.DateTimeField(null=True, blank=True)
     last_accessed = models.DateTimeField(auto_now=True)
     bookmarked = models.BooleanField(default=False)
+    changed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Time of the last change, by the client's clock for synced writes",
+    )
+
+    objects = UserProgressQuerySet.as_manager()
 
     class Meta:
         unique_together = [("user", "lesson")]
+        # Partial indexes: SQLite can only match boolean filters against
+        # an index's WHERE clause, never against a key column
+        indexes = [
+            models.Index(
+                fields=["user", "-last_accessed"],
+                condition=Q(is_completed=False),
+                name="progress_recent_idx",
+            ),
+            models.Index(
+                fields=["user", "lesson"],
+                condition=Q(is_completed=True),
+                name="progress_completed_idx",
+            ),
+            models.Index(
+                fields=["user", "lesson"],
+                condition=Q(bookmarked=True),
+                name="progress_bookmarked_idx",
+            ),
+        ]
         verbose_name_plural = "User Progress Records"
 
     def __str__(self):
         status = "Completed" if self.is_completed else "In Progress"
         return f"{self.user.email} - {self.lesson.title} ({status})"
+
+
+class UserLevelStatsQuerySet(models.QuerySet):
+    def bump(self, user, level_id, completed=0, bookmarked=0):
+        """
+        Shift the user's counters on a level by the given deltas, creating
+        the row if there is none, in one INSERT ... ON CONFLICT DO UPDATE.
+        """
+        if not (completed or bookmarked):
+            return
+
+        connection = connections[self.db]
+        qn = connection.ops.quote_name
+        table = qn(self.model._meta.db_table)
+        greatest = "MAX" if connection.vendor == "sqlite" else "GREATEST"
+        # CHECK constraints apply to the proposed row even when it conflicts,
+        # so a new row starts at the clamped deltas. Clamped on update too, so
+        # a counter that is already off can't break the CHECK.
+        sql = f"""
+            INSERT INTO {table} ({qn("user_id")}, {qn("level_id")}, {qn("completed")}, {qn("bookmarked")})
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT ({qn("user_id")}, {qn("level_id")}) DO UPDATE SET
+                {qn("completed")} = {greatest}({table}.{qn("completed")} + %s, 0),
+                {qn("bookmarked")} = {greatest}({table}.{qn("bookmarked")} + %s, 0)
+        """
+        params = [user.pk, level_id, max(completed, 0), max(bookmarked, 0), completed, bookmarked]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+    def computed(self, progress=None):
+        """
+        Recount (user, level) pairs straight from `progress`, by default
+        every `UserProgress` row.
+        """
+        if progress is None:
+            progress = UserProgress.objects.all()
+        return (
+            progress.order_by()
+            .values("user", "lesson__level")
+            .annotate(
+                completed=Count("pk", filter=Q(is_completed=True)),
+                bookmarked=Count("pk", filter=Q(bookmarked=True)),
+            )
+        )
+
+    @transaction.atomic
+    def rebuild(self):
+        """
+        Replace all counters with a fresh recount and return how many
+        rows were written.
+        """
+        self.all().delete()
+        return self._create_from(self.computed())
+
+    @transaction.atomic
+    def recount(self, levels, user=None):
+        """
+        Replace the counters on `levels` (ids or a subquery), of one user or
+        of everyone, with a fresh recount and return how many rows were
+        written.
+        """
+        stats = self.filter(level__in=levels)
+        progress = UserProgress.objects.filter(lesson__level__in=levels)
+        if user is not None:
+            stats = stats.filter(user=user)
+            progress = progress.filter(user=user)
+        stats.delete()
+        return self._create_from(self.computed(progress))
+
+    def _create_from(self, counts):
+        stats = self.bulk_create(
+            UserLevelStats(
+                user_id=row["user"],
+                level_id=row["lesson__level"],
+                completed=row["completed"],
+                bookmarked=row["bookmarked"],
+            )
+            for row in counts
+            if row["completed"] or row["bookmarked"]
+        )
+        return len(stats)
+
+
+class UserLevelStats(models.Model):
+    """
+    Denormalized per-user, per-level progress counters.
+
+    The progress endpoints shift them by the change each write makes. Any
+    other change to `UserProgress` (admin edits, deletes, lessons moved
+    between levels) recounts the affected levels, see `core.signals`.
+    `manage.py rebuild_level_stats` recounts everything.
+    """
+
+    user = models.ForeignKey("users.User", on_delete=models.CASCADE)
+    level = models.ForeignKey(Level, on_delete=models.CASCADE, related_name="stats")
+    completed = models.PositiveIntegerField(default=0)
+    bookmarked = models.PositiveIntegerField(default=0)
+
+    objects = UserLevelStatsQuerySet.as_manager()
+
+    class Meta:
+        unique_together = [("user", "level")]
+        verbose_name_plural = "User Level Stats"
+
+    def __str__(self):
+        return f"{self.user.email} - {self.level.title} ({self.completed} completed)"
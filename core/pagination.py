@@ -0,0 +1,123 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from operator import attrgetter
+
+from django.db.models import Q, QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class CourseCursorPagination(BasePagination):
+    """
+    Forward-only keyset pagination in course order.
+
+    Views may set `cursor_ordering` to the lookups that uniquely order their
+    results (default: level order, then lesson order). The cursor encodes the
+    last item's values for those lookups, so each page is a single range scan
+    for querysets and a linear skip for lists served from the catalog cache.
+    """
+
+    ordering = ("level__order_index", "order_index")
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.request = request
+        self.ordering = getattr(view, "cursor_ordering", self.ordering)
+        position = self.decode_cursor(request)
+
+        if isinstance(queryset, QuerySet):
+            queryset = queryset.order_by(*self.ordering)
+            if position is not None:
+                queryset = queryset.filter(self.after(position))
+            results = list(queryset[: self.page_size + 1])
+        else:
+            results = [
+                item
+                for item in queryset
+                if position is None or self.get_position(item) > position
+            ][: self.page_size + 1]
+
+        self.has_next = len(results) > self.page_size
+        self.page = results[: self.page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size < 1:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_position(self, item):
+        return tuple(
+            attrgetter(field.replace("__", "."))(item) for field in self.ordering
+        )
+
+    def after(self, position):
+        """
+        `(a, b) > (x, y)` spelled as `a > x OR (a = x AND b > y)`.
+        """
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            step = Q(**dict(zip(self.ordering[:index], position[:index])))
+            condition |= step & Q(**{f"{field}__gt": position[index]})
+        return condition
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            position = json.loads(urlsafe_b64decode(encoded.encode()))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        # One integer per ordering lookup, small enough for any database
+        if not (
+            isinstance(position, list)
+            and len(position) == len(self.ordering)
+            and all(type(value) is int and -(2**63) <= value < 2**63 for value in position)
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        return tuple(position)
+
+    def encode_cursor(self, position):
+        return urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        cursor = self.encode_cursor(self.get_position(self.page[-1]))
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {
+                    "type": "string",
+                    "nullable": True,
+                    "format": "uri",
+                    "example": f"http://api.example.org/accounts/?{self.cursor_query_param}=WzEsIDJd",
+                },
+                "results": schema,
+            },
+        }
@@ -13,6 +13,9 @@ class LevelSerializer(serializers.ModelSerializer):
 		fields = ['order', 'title', 'description', 'is_active', 'unlock_threshold', 'is_unlocked']
 	
 	def get_is_unlocked(self, obj)-> bool :
+		# Set by catalog.with_unlock_state()
+		if hasattr(obj, 'is_unlocked'):
+			return obj.is_unlocked
 		request = self.context.get('request')
 		if request and request.user.is_authenticated:
 			return obj.is_level_unlocked(request.user)
@@ -21,17 +24,22 @@ class LevelSerializer(serializers.ModelSerializer):
 	def get_order(self,obj)-> int:
 		return obj.order_index
 
-class LessonSerializer(serializers.ModelSerializer):
+class LessonSummarySerializer(serializers.ModelSerializer):
+	"""Lesson without its content body, for listings"""
 	user_progress = serializers.SerializerMethodField()
 	
 	class Meta:
 		model = Lesson
 		fields = [
-			'id', 'title', 'content', 'content_type', 
+			'id', 'title', 'content_type', 
 			'duration', 'order_index', 'video', 'user_progress'
 		]
 	
 	def get_user_progress(self, obj)-> int:
+		# Prefetched by Lesson.objects.with_user_progress()
+		if hasattr(obj, 'user_progress_rows'):
+			rows = obj.user_progress_rows
+			return UserProgressSerializer(rows[0]).data if rows else None
 		request = self.context.get('request')
 		if request and request.user.is_authenticated:
 			try:
@@ -44,6 +52,14 @@ class LessonSerializer(serializers.ModelSerializer):
 				return None
 		return None
 
+class LessonSerializer(LessonSummarySerializer):
+	
+	class Meta(LessonSummarySerializer.Meta):
+		fields = [
+			'id', 'title', 'content', 'content_type', 
+			'duration', 'order_index', 'video', 'user_progress'
+		]
+
 class UserProgressSerializer(serializers.ModelSerializer):
 	class Meta:
 		model = UserProgress
@@ -53,6 +69,20 @@ class UserProgressSerializer(serializers.ModelSerializer):
 		]
 		read_only_fields = ['completed_at', 'last_accessed']
 
+class ProgressSyncRecordSerializer(serializers.Serializer):
+	lesson_id = serializers.IntegerField()
+	is_completed = serializers.BooleanField(required=False)
+	bookmarked = serializers.BooleanField(required=False)
+	client_ts = serializers.DateTimeField()
+
+class ProgressSyncSerializer(serializers.Serializer):
+	records = ProgressSyncRecordSerializer(many=True, allow_empty=False, max_length=500)
+
+class ProgressSyncResultSerializer(serializers.Serializer):
+	lesson_id = serializers.IntegerField()
+	status = serializers.ChoiceField(choices=['applied', 'stale', 'not_found'])
+	progress = UserProgressSerializer(allow_null=True)
+
 class UserLevelProgressSerializer(serializers.Serializer):
 	level_id = serializers.IntegerField()
 	completed = serializers.IntegerField()
@@ -63,4 +93,4 @@ class BookmarkSerializer(serializers.ModelSerializer):
 	
 	class Meta:
 		model = Lesson
-		fields = ['id', 'title', 'content', 'order_index']
+		fields = ['id', 'title', 'order_index']
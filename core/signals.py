@@ -0,0 +1,79 @@
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import catalog
+from .conditional import bump_progress_version
+from .models import Level, Lesson, UserLevelStats, UserProgress
+
+
+@receiver([post_save, post_delete], sender=Level)
+@receiver([post_save, post_delete], sender=Lesson)
+def invalidate_catalog(sender, **kwargs):
+    """
+    Any editorial change to levels or lessons invalidates the cached catalog.
+    """
+    catalog.bump_version()
+    # Again once committed, dropping anything re-cached from the old rows
+    transaction.on_commit(catalog.bump_version)
+
+
+# UserLevelStats: the progress endpoints write without model signals and
+# shift the counters and the progress version themselves; everything else
+# is handled here.
+
+
+def _deleted_model(origin):
+    return origin.model if isinstance(origin, models.QuerySet) else type(origin)
+
+
+def _progress_changed(user_id):
+    bump_progress_version(user_id)
+    # Again once committed, like invalidate_catalog
+    transaction.on_commit(lambda: bump_progress_version(user_id))
+
+
+@receiver(post_save, sender=UserProgress)
+def recount_saved_progress(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    _progress_changed(instance.user_id)
+    if created and not (instance.is_completed or instance.bookmarked):
+        return
+    UserLevelStats.objects.recount(
+        Lesson.objects.filter(pk=instance.lesson_id).values("level"), user=instance.user_id
+    )
+
+
+@receiver(post_delete, sender=UserProgress)
+def recount_deleted_progress(sender, instance, origin=None, **kwargs):
+    # Deleting a lesson recounts its level below; a deleted user's or
+    # level's counters are deleted with it
+    if _deleted_model(origin) is not UserProgress:
+        return
+    _progress_changed(instance.user_id)
+    UserLevelStats.objects.recount(
+        Lesson.objects.filter(pk=instance.lesson_id).values("level"), user=instance.user_id
+    )
+
+
+@receiver(pre_save, sender=Lesson)
+def remember_lesson_level(sender, instance, raw=False, **kwargs):
+    instance.previous_level_id = None
+    if instance.pk and not raw:
+        instance.previous_level_id = (
+            Lesson.objects.filter(pk=instance.pk).values_list("level_id", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Lesson)
+def recount_moved_lesson(sender, instance, **kwargs):
+    previous = instance.previous_level_id
+    if previous is not None and previous != instance.level_id:
+        UserLevelStats.objects.recount([previous, instance.level_id])
+
+
+@receiver(post_delete, sender=Lesson)
+def recount_deleted_lesson(sender, instance, origin=None, **kwargs):
+    if _deleted_model(origin) is not Level:
+        UserLevelStats.objects.recount([instance.level_id])
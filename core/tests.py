@@ -1,3 +1,1538 @@
-from django.test import TestCase
+import json
+import os
+import runpy
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from base64 import urlsafe_b64encode
+from datetime import datetime, timezone
+from io import StringIO
+from typing import NamedTuple
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection, transaction
+from django.test import (
+    LiveServerTestCase,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path, resolve, reverse
+from django.utils.http import http_date
+from prometheus_client.parser import text_string_to_metric_families
+from rest_framework.test import APITestCase
+
+from users import urls as users_urls
+from users.models import OutgoingEmail
+from users.serializers import TokenObtainPairSerializer
+from users.tests import FAST_HASHER_PARAMS
+from users.tokens import uid_token
+
+from . import catalog, urls as core_urls
+from .conditional import bump_progress_version
+from .async_urls import async_views
+from .management.commands import populate_db
+from .management.commands.benchmark_load import load_collection, percentile
+from .models import Level, Lesson, UserLevelStats, UserProgress
+
+User = get_user_model()
+
+# Wall-clock limits only hold on a known machine, so they are checked only
+# when LATENCY_BUDGET_FACTOR is set, and scaled by it: 1 on a quiet
+# workstation, more on a slower or shared runner. Query counts always are.
+LATENCY_BUDGET_FACTOR = float(os.environ.get("LATENCY_BUDGET_FACTOR") or 0)
+
+
+class ContentTestCase(APITestCase):
+    """
+    Shared fixture: a course of `levels` levels with `lessons` lessons each,
+    every level after the first requiring 2 completed lessons to unlock.
+    """
+
+    levels = 3
+    lessons = 3
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="seeker@example.com",
+            password="password123",
+            first_name="Seeker",
+            last_name="Light",
+            is_active=True,
+        )
+        self.client.force_authenticate(self.user)
+        self.build_course(self.levels, self.lessons)
+
+    def build_course(self, levels, lessons, start=1):
+        for order in range(start, start + levels):
+            level = Level.objects.create(
+                title=f"Level {order}",
+                order_index=order,
+                unlock_threshold=0 if order == 1 else 2,
+            )
+            Lesson.objects.bulk_create(
+                Lesson(
+                    level=level,
+                    title=f"Lesson {order}.{index}",
+                    content="content",
+                    order_index=index,
+                )
+                for index in range(1, lessons + 1)
+            )
+        catalog.bump_version()
+
+    def complete(self, *lessons):
+        # Through the API, so UserLevelStats stays in step
+        for lesson in lessons:
+            self.client.patch(
+                reverse("progress-update", args=[lesson.id]), {"is_completed": True}
+            )
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+
+class LevelUnlockTests(ContentTestCase):
+    def test_unlock_state_follows_previous_level_progress(self):
+        first, second = Level.objects.active()[:2]
+        self.complete(*first.lessons.all()[:2])
+
+        response = self.client.get(reverse("level-list"))
+
+        unlocked = [level["is_unlocked"] for level in response.data["results"]]
+        self.assertEqual(unlocked, [True, True, False])
+        self.assertTrue(second.is_level_unlocked(self.user))
+
+    def test_missing_previous_level_unlocks(self):
+        Level.objects.filter(order_index=2).delete()
+
+        level = Level.objects.get(order_index=3)
+        catalog.with_unlock_state([level], self.user)
+
+        self.assertTrue(level.is_unlocked)
+
+    def test_counters_and_progress_rows_agree(self):
+        # Level lists read UserLevelStats, the next lesson counts progress rows
+        levels = list(Level.objects.active())
+        lessons = {lesson.id: lesson for lesson in Lesson.objects.all()}
+
+        def unlocked():
+            by_counters = [
+                level.is_unlocked
+                for level in catalog.with_unlock_state(levels, self.user)
+            ]
+            progress = {
+                row.lesson_id: row for row in UserProgress.objects.filter(user=self.user)
+            }
+            by_rows = [
+                level.is_unlocked
+                for level in catalog._set_unlock_state(
+                    levels, catalog._completed_counts(progress, lessons), levels
+                )
+            ]
+            one_by_one = [level.is_level_unlocked(self.user) for level in levels]
+            self.assertEqual(by_counters, by_rows)
+            self.assertEqual(by_counters, one_by_one)
+            return by_counters
+
+        self.assertEqual(unlocked(), [True, False, False])
+        self.complete(*levels[0].lessons.all()[:2])
+        self.assertEqual(unlocked(), [True, True, False])
+        self.complete(*levels[1].lessons.all())
+        self.assertEqual(unlocked(), [True, True, True])
+        self.client.patch(
+            reverse("progress-update", args=[levels[0].lessons.first().id]),
+            {"is_completed": False},
+        )
+        self.assertEqual(unlocked(), [True, False, True])
+
+    def test_level_list_query_count_is_constant(self):
+        url = reverse("level-list")
+        baseline = self.count_queries(url)
+
+        self.build_course(10, 1, start=self.levels + 1)
+
+        self.assertEqual(self.count_queries(url), baseline)
+
+
+class ProgressSummaryTests(ContentTestCase):
+    def test_summary_counts_completed_lessons_per_level(self):
+        first = Level.objects.get(order_index=1)
+        self.complete(*first.lessons.all()[:2])
+
+        response = self.client.get(reverse("progress-summary"))
+
+        self.assertEqual(
+            response.data[0],
+            {"level_id": first.id, "completed": 2, "total": 3, "percentage": 66},
+        )
+        self.assertEqual(response.data[1]["completed"], 0)
+
+    def test_summary_query_count_is_constant(self):
+        url = reverse("progress-summary")
+        baseline = self.count_queries(url)
+
+        self.build_course(10, 2, start=self.levels + 1)
+        self.complete(*Lesson.objects.all())
+
+        self.assertEqual(self.count_queries(url), baseline)
+
+
+class LessonProgressTests(ContentTestCase):
+    def test_level_lessons_include_user_progress(self):
+        level = Level.objects.get(order_index=1)
+        self.complete(level.lessons.first())
+
+        response = self.client.get(reverse("level-lessons", args=[level.id]))
+
+        progress = [lesson["user_progress"] for lesson in response.data["results"]]
+        self.assertTrue(progress[0]["is_completed"])
+        self.assertEqual(progress[1:], [None, None])
+
+    def test_level_lessons_query_count_is_constant(self):
+        level = Level.objects.get(order_index=1)
+        url = reverse("level-lessons", args=[level.id])
+        baseline = self.count_queries(url)
+
+        Lesson.objects.bulk_create(
+            Lesson(level=level, title="Extra", content="content", order_index=index)
+            for index in range(self.lessons + 1, self.lessons + 21)
+        )
+        catalog.bump_version()
+        self.complete(*level.lessons.all())
+
+        self.assertEqual(self.count_queries(url), baseline)
+
+
+class UserLevelStatsTests(ContentTestCase):
+    def test_progress_updates_maintain_counters(self):
+        level = Level.objects.get(order_index=1)
+        first, second = level.lessons.all()[:2]
+        url = reverse("progress-update", args=[first.id])
+
+        self.complete(first, second)
+        self.client.patch(url, {"is_completed": True, "bookmarked": True})
+        self.client.patch(url, {"is_completed": False})
+
+        stats = UserLevelStats.objects.get(user=self.user, level=level)
+        self.assertEqual((stats.completed, stats.bookmarked), (1, 1))
+
+    def test_rebuild_repairs_drift(self):
+        self.complete(*Level.objects.get(order_index=1).lessons.all())
+        UserLevelStats.objects.update(completed=0)
+
+        with self.assertRaises(CommandError):
+            call_command("rebuild_level_stats", "--check", stdout=StringIO())
+        call_command("rebuild_level_stats", stdout=StringIO())
+        call_command("rebuild_level_stats", "--check", stdout=StringIO())
+
+        self.assertEqual(UserLevelStats.objects.get().completed, self.lessons)
+
+    def counters(self, level):
+        stats = UserLevelStats.objects.filter(user=self.user, level=level).first()
+        return (stats.completed, stats.bookmarked) if stats else (0, 0)
+
+    def test_deleting_a_lesson_recounts_its_level(self):
+        level = Level.objects.get(order_index=1)
+        first, second, _ = level.lessons.all()
+        self.complete(first, second)
+
+        first.delete()
+
+        self.assertEqual(self.counters(level), (1, 0))
+        summary = self.client.get(reverse("progress-summary")).data[0]
+        self.assertEqual((summary["completed"], summary["total"]), (1, 2))
+
+    def test_moving_a_lesson_recounts_both_levels(self):
+        level, other = Level.objects.filter(order_index__in=[1, 2])
+        first, second, _ = level.lessons.all()
+        self.complete(first, second)
+
+        first.level = other
+        first.order_index = 99
+        first.save()
+
+        self.assertEqual(self.counters(level), (1, 0))
+        self.assertEqual(self.counters(other), (1, 0))
+
+    def test_progress_edited_outside_the_api(self):
+        level = Level.objects.get(order_index=1)
+        lesson = level.lessons.first()
+
+        progress = UserProgress.objects.create(user=self.user, lesson=lesson, is_completed=True)
+        self.assertEqual(self.counters(level), (1, 0))
+
+        response = self.client.patch(
+            reverse("progress-update", args=[lesson.id]), {"is_completed": False, "bookmarked": True}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.counters(level), (0, 1))
+
+        progress.delete()
+        self.assertEqual(self.counters(level), (0, 0))
+
+    def test_counters_never_go_below_zero(self):
+        level = Level.objects.get(order_index=1)
+        UserLevelStats.objects.create(user=self.user, level=level)
+
+        UserLevelStats.objects.bump(self.user, level.id, completed=-1, bookmarked=-1)
+
+        self.assertEqual(self.counters(level), (0, 0))
+
+    def test_admin_shows_counters_read_only(self):
+        level = Level.objects.get(order_index=1)
+        self.complete(level.lessons.first())
+        stats = UserLevelStats.objects.get(user=self.user, level=level)
+        admin_user = User.objects.create_superuser(email="admin@example.com", password="password123")
+        self.client.force_login(admin_user)
+        change_url = reverse("admin:core_userlevelstats_change", args=[stats.pk])
+
+        self.assertEqual(self.client.get(change_url).status_code, 200)
+        response = self.client.post(
+            change_url, {"user": self.user.pk, "level": level.pk, "completed": 9, "bookmarked": 9}
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.client.get(reverse("admin:core_userlevelstats_add")).status_code, 403)
+        stats.refresh_from_db()
+        self.assertEqual((stats.completed, stats.bookmarked), (1, 0))
+
+
+class CatalogCacheTests(ContentTestCase):
+    def test_warm_catalog_reads_only_per_user_state(self):
+        level = Level.objects.get(order_index=1)
+        lesson = level.lessons.first()
+        urls = [
+            reverse("level-list"),
+            reverse("level-detail", args=[level.id]),
+            reverse("level-lessons", args=[level.id]),
+            reverse("lesson-detail", args=[lesson.id]),
+        ]
+        for url in urls:
+            self.client.get(url)
+
+        # One query each for the user's counters or progress rows
+        for url in urls:
+            self.assertEqual(self.count_queries(url), 1)
+
+    def test_editing_a_lesson_invalidates_the_catalog(self):
+        lesson = Lesson.objects.first()
+        url = reverse("lesson-detail", args=[lesson.id])
+        self.client.get(url)
+
+        lesson.title = "Renamed"
+        lesson.save()
+
+        self.assertEqual(self.client.get(url).data["title"], "Renamed")
+
+    def test_bookmarks_follow_course_order(self):
+        lessons = list(Lesson.objects.order_by("-level__order_index", "-order_index")[:3])
+        for lesson in lessons:
+            self.client.patch(
+                reverse("progress-update", args=[lesson.id]), {"bookmarked": True}
+            )
+
+        response = self.client.get(reverse("bookmarked-lessons"))
+
+        self.assertEqual(
+            [item["id"] for item in response.data["results"]],
+            [lesson.id for lesson in reversed(lessons)],
+        )
+
+
+class ConditionalGetTests(ContentTestCase):
+    def test_matching_etag_returns_not_modified_without_queries(self):
+        level = Level.objects.get(order_index=1)
+        for url in (
+            reverse("level-list"),
+            reverse("level-lessons", args=[level.id]),
+            reverse("lesson-detail", args=[level.lessons.first().id]),
+        ):
+            etag = self.client.get(url)["ETag"]
+
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_progress_and_catalog_changes_refresh_the_etag(self):
+        lesson = Lesson.objects.first()
+        url = reverse("lesson-detail", args=[lesson.id])
+        etag = self.client.get(url)["ETag"]
+
+        self.complete(lesson)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data["user_progress"]["is_completed"])
+
+        etag = response["ETag"]
+        lesson.title = "Renamed"
+        lesson.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_progress_edited_outside_the_api_refreshes_the_etag(self):
+        lesson = Lesson.objects.first()
+        self.complete(lesson)
+        url = reverse("level-lessons", args=[lesson.level_id])
+        progress = UserProgress.objects.get(user=self.user, lesson=lesson)
+
+        etag = self.client.get(url)["ETag"]
+        progress.is_completed = False
+        progress.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        etag = response["ETag"]
+        progress.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_last_modified_waits_for_its_second_to_pass(self):
+        url = reverse("level-list")
+        # Well after the catalog's version, which comes from the real clock
+        second = int(time.time()) + 100
+
+        with mock.patch("core.conditional.time") as clock:
+            clock.time_ns.return_value = second * 10**9 + 200_000_000
+            bump_progress_version(self.user.pk)
+
+            clock.time.return_value = second + 0.5
+            self.assertNotIn("Last-Modified", self.client.get(url))
+
+            clock.time.return_value = second + 1
+            self.assertEqual(self.client.get(url)["Last-Modified"], http_date(second))
+
+
+class PaginationTests(ContentTestCase):
+    def collect(self, url):
+        items = []
+        while url:
+            response = self.client.get(url)
+            items += response.data["results"]
+            url = response.data["next"]
+        return items
+
+    def test_bookmarks_page_through_course_order(self):
+        lessons = list(Lesson.objects.order_by("level__order_index", "order_index"))
+        for lesson in lessons:
+            self.client.patch(
+                reverse("progress-update", args=[lesson.id]), {"bookmarked": True}
+            )
+
+        items = self.collect(reverse("bookmarked-lessons") + "?page_size=2")
+
+        self.assertEqual([item["id"] for item in items], [lesson.id for lesson in lessons])
+
+    def test_catalog_lists_page_through_in_order(self):
+        levels = self.collect(reverse("level-list") + "?page_size=2")
+
+        self.assertEqual([level["order"] for level in levels], [1, 2, 3])
+
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get(reverse("level-list") + "?cursor=garbage")
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_malformed_cursors_are_not_found(self):
+        level = Level.objects.get(order_index=1)
+        urls = [
+            reverse("level-list"),
+            reverse("level-lessons", args=[level.id]),
+            reverse("bookmarked-lessons"),
+        ]
+        payloads = ['["x"]', "[[1], [2]]", '"ab"', "[1e400, 1]", "[true, 1]", f"[{2**64}, 1]", "{}", "1"]
+
+        for url in urls:
+            for payload in payloads:
+                with self.subTest(url=url, payload=payload):
+                    cursor = urlsafe_b64encode(payload.encode()).decode()
+                    response = self.client.get(url, {"cursor": cursor})
+                    self.assertEqual(response.status_code, 404)
+
+
+class LessonSummaryTests(ContentTestCase):
+    def test_listings_leave_out_lesson_content(self):
+        level = Level.objects.get(order_index=1)
+        lesson = level.lessons.first()
+        self.client.patch(reverse("progress-update", args=[lesson.id]), {"bookmarked": True})
+
+        for url in (reverse("level-lessons", args=[level.id]), reverse("bookmarked-lessons")):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url)
+            self.assertNotIn("content", response.data["results"][0])
+            for query in ctx.captured_queries:
+                self.assertNotIn('"core_lesson"."content"', query["sql"])
+
+        response = self.client.get(reverse("lesson-detail", args=[lesson.id]))
+        self.assertEqual(response.data["content"], "content")
+
+
+class NextLessonTests(ContentTestCase):
+    def test_last_accessed_incomplete_lesson_comes_first(self):
+        lesson = Lesson.objects.get(level__order_index=1, order_index=3)
+        self.client.patch(reverse("progress-update", args=[lesson.id]), {"bookmarked": True})
+
+        response = self.client.get(reverse("next-lesson"))
+
+        self.assertEqual(response.data["id"], lesson.id)
+        self.assertNotIn("content", response.data)
+
+    def test_first_incomplete_lesson_of_an_unlocked_level(self):
+        first_level = Lesson.objects.filter(level__order_index=1)
+        self.complete(*first_level)
+
+        response = self.client.get(reverse("next-lesson"))
+
+        self.assertEqual(
+            response.data["id"],
+            Lesson.objects.get(level__order_index=2, order_index=1).id,
+        )
+
+    def test_locked_levels_are_skipped(self):
+        self.complete(*Lesson.objects.filter(level__order_index=1))
+        self.complete(Lesson.objects.get(level__order_index=2, order_index=1))
+
+        # Level 3 needs 2 completed lessons in level 2, so level 2 continues
+        response = self.client.get(reverse("next-lesson"))
+
+        self.assertEqual(
+            response.data["id"],
+            Lesson.objects.get(level__order_index=2, order_index=2).id,
+        )
+
+    def test_everything_completed(self):
+        self.complete(*Lesson.objects.all())
+
+        response = self.client.get(reverse("next-lesson"))
+
+        self.assertEqual(response.status_code, 204)
+
+
+class NextLessonBenchmark(ContentTestCase):
+    """
+    50 levels x 40 lessons with the user on the very last lesson: the
+    worst case for the recommendation walk.
+    """
+
+    levels = 50
+    lessons = 40
+
+    def setUp(self):
+        super().setUp()
+        *done, last = Lesson.objects.order_by("level__order_index", "order_index")
+        UserProgress.objects.bulk_create(
+            UserProgress(user=self.user, lesson=lesson, is_completed=True)
+            for lesson in done
+        )
+        UserLevelStats.objects.rebuild()
+        self.last = last
+
+    def test_next_lesson_costs_one_query(self):
+        url = reverse("next-lesson")
+        self.client.get(url)
+
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(response.data["id"], self.last.id)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        if LATENCY_BUDGET_FACTOR:
+            self.assertLess(elapsed, 0.5 * LATENCY_BUDGET_FACTOR)
+
+
+class UserProgressIndexTests(ContentTestCase):
+    """
+    The hot UserProgress filters must be served by an index, not a table scan.
+    """
+
+    # Other learners' rows, enough that scanning the table costs more than
+    # the indexes without the planner being forced either way
+    learners = 1000
+
+    def setUp(self):
+        super().setUp()
+        self.complete(*Lesson.objects.filter(level__order_index=1))
+
+        lessons = list(Lesson.objects.all())
+        learners = User.objects.bulk_create(
+            User(email=f"learner{index}@example.com", password="!")
+            for index in range(self.learners)
+        )
+        UserProgress.objects.bulk_create(
+            UserProgress(
+                user=learner,
+                lesson=lesson,
+                is_completed=position < len(lessons) - 1,
+                bookmarked=position == 0 and index % 10 == 0,
+            )
+            for index, learner in enumerate(learners)
+            for position, lesson in enumerate(lessons)
+        )
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE core_userprogress")
+
+    def assertUsesIndex(self, queryset, index):
+        plan = queryset.explain()
+        self.assertIn(index, plan)
+        self.assertNotRegex(plan, r"(SCAN|Seq Scan on) core_userprogress\b")
+
+    def test_recently_accessed_lookup(self):
+        queryset = UserProgress.objects.filter(
+            user=self.user, is_completed=False
+        ).order_by("-last_accessed")
+        self.assertUsesIndex(queryset, "progress_recent_idx")
+
+    def test_bookmarks_lookup(self):
+        queryset = UserProgress.objects.filter(user=self.user, bookmarked=True)
+        self.assertUsesIndex(queryset, "progress_bookmarked_idx")
+
+    def test_completed_in_level_count(self):
+        queryset = UserProgress.objects.filter(
+            user=self.user,
+            is_completed=True,
+            lesson__level=Level.objects.get(order_index=1),
+        ).values("pk")
+        self.assertUsesIndex(queryset, "progress_completed_idx")
+
+
+class ProgressBatchTests(ContentTestCase):
+    def sync(self, *records):
+        return self.client.post(
+            reverse("progress-batch"), {"records": list(records)}, format="json"
+        )
+
+    def test_batch_applies_records_and_counters(self):
+        first, second = Lesson.objects.filter(level__order_index=1)[:2]
+
+        response = self.sync(
+            {"lesson_id": first.id, "is_completed": True, "client_ts": "2026-01-01T10:00:00Z"},
+            {"lesson_id": second.id, "bookmarked": True, "client_ts": "2026-01-01T10:01:00Z"},
+            {"lesson_id": 0, "is_completed": True, "client_ts": "2026-01-01T10:02:00Z"},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item["status"] for item in response.data], ["applied", "applied", "not_found"]
+        )
+        self.assertTrue(response.data[0]["progress"]["is_completed"])
+        stats = UserLevelStats.objects.get(user=self.user, level=first.level)
+        self.assertEqual((stats.completed, stats.bookmarked), (1, 1))
+
+    def test_last_writer_wins(self):
+        lesson = Lesson.objects.first()
+        self.sync(
+            {"lesson_id": lesson.id, "is_completed": True, "client_ts": "2026-01-01T10:05:00Z"}
+        )
+
+        response = self.sync(
+            {"lesson_id": lesson.id, "is_completed": False, "client_ts": "2026-01-01T10:00:00Z"},
+            {"lesson_id": lesson.id, "bookmarked": True, "client_ts": "2026-01-01T10:10:00Z"},
+        )
+
+        self.assertEqual([item["status"] for item in response.data], ["stale", "applied"])
+        progress = UserProgress.objects.get(user=self.user, lesson=lesson)
+        self.assertTrue(progress.is_completed)
+        self.assertTrue(progress.bookmarked)
+        self.assertEqual(UserProgress.objects.count(), 1)
+
+    def test_future_timestamps_count_as_now(self):
+        lesson = Lesson.objects.first()
+        self.sync(
+            {"lesson_id": lesson.id, "is_completed": True, "client_ts": "2099-01-01T00:00:00Z"}
+        )
+
+        progress = UserProgress.objects.get(user=self.user, lesson=lesson)
+        self.assertLessEqual(progress.changed_at, datetime.now(timezone.utc))
+        self.assertLessEqual(progress.completed_at, datetime.now(timezone.utc))
+
+        response = self.sync(
+            {
+                "lesson_id": lesson.id,
+                "is_completed": False,
+                "client_ts": datetime.now(timezone.utc).isoformat(),
+            }
+        )
+
+        self.assertEqual(response.data[0]["status"], "applied")
+        self.assertFalse(response.data[0]["progress"]["is_completed"])
+
+    def test_batch_is_a_bounded_number_of_queries(self):
+        lessons = list(Lesson.objects.filter(level__order_index=1))
+        records = [
+            {"lesson_id": lesson.id, "is_completed": True, "client_ts": "2026-01-01T10:00:00Z"}
+            for lesson in lessons
+        ]
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.sync(*records)
+        few = len(ctx.captured_queries)
+
+        self.build_course(1, 20, start=self.levels + 1)
+        records = [
+            {"lesson_id": lesson.id, "bookmarked": True, "client_ts": "2026-01-01T10:00:00Z"}
+            for lesson in Lesson.objects.filter(level__order_index=self.levels + 1)
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            self.sync(*records)
+
+        self.assertEqual(len(ctx.captured_queries), few)
+
+
+class ProgressSyncRaceTests(TransactionTestCase):
+    def test_concurrent_batches_creating_a_row_count_it_once(self):
+        if connection.vendor != "postgresql":
+            self.skipTest("SQLite runs one writing transaction at a time")
+        user = User.objects.create_user(email="seeker@example.com", password="password123")
+        level = Level.objects.create(title="Level 1", order_index=1, unlock_threshold=0)
+        lesson = Lesson.objects.create(level=level, title="Lesson 1", content="content", order_index=1)
+        records = [
+            {"lesson_id": lesson.id, "is_completed": True, "client_ts": datetime.now(timezone.utc)}
+        ]
+        first_synced = threading.Event()
+
+        def first():
+            try:
+                with transaction.atomic():
+                    UserProgress.objects.sync(user, records)
+                    first_synced.set()
+                    # Keep the new row uncommitted while the second batch starts
+                    time.sleep(0.5)
+            finally:
+                connection.close()
+
+        def second():
+            first_synced.wait(5)
+            try:
+                UserProgress.objects.sync(user, records)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=first), threading.Thread(target=second)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = UserLevelStats.objects.get(user=user, level=level)
+        self.assertEqual(stats.completed, 1)
+
+
+class ProgressUpsertTests(ContentTestCase):
+    def test_unknown_lesson_is_not_found(self):
+        response = self.client.patch(reverse("progress-update", args=[0]), {"bookmarked": True})
+
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(UserProgress.objects.exists())
+
+    def test_tap_returns_the_stored_row(self):
+        lesson = Lesson.objects.first()
+        url = reverse("progress-update", args=[lesson.id])
+
+        self.client.post(url, {"bookmarked": True})
+        response = self.client.patch(url, {"is_completed": True})
+
+        self.assertTrue(response.data["is_completed"])
+        self.assertTrue(response.data["bookmarked"])
+        self.assertIsNotNone(response.data["completed_at"])
+
+    def statements(self, url, data):
+        """SQL statements of one tap, without the savepoints around them."""
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.patch(url, data)
+        return [
+            query["sql"]
+            for query in ctx.captured_queries
+            if not query["sql"].startswith(("SAVEPOINT", "RELEASE SAVEPOINT"))
+        ]
+
+    def test_tap_is_one_statement_per_table_on_postgresql(self):
+        if connection.vendor != "postgresql":
+            self.skipTest("ON CONFLICT upsert path is PostgreSQL-only")
+        lesson = Lesson.objects.first()
+        url = reverse("progress-update", args=[lesson.id])
+        catalog.get_lesson(lesson.id)
+        self.assertFalse(UserLevelStats.objects.exists())
+
+        # A new progress row and a new counter row
+        self.assertEqual(len(self.statements(url, {"is_completed": True})), 2)
+        # Both rows exist now
+        self.assertEqual(len(self.statements(url, {"bookmarked": True})), 2)
+        # Unchanged flags leave UserLevelStats alone, so only the upsert runs
+        self.assertEqual(len(self.statements(url, {"bookmarked": True})), 1)
+
+        stats = UserLevelStats.objects.get(user=self.user, level=lesson.level)
+        self.assertEqual((stats.completed, stats.bookmarked), (1, 1))
+
+
+@override_settings(MIDDLEWARE=settings.API_MIDDLEWARE)
+class APIModeTests(ContentTestCase):
+    def test_api_requests_skip_browser_middleware(self):
+        response = self.client.get(reverse("level-list"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Frame-Options", response.headers)
+        self.assertNotIn("Cookie", response.headers.get("Vary", ""))
+
+    def test_jwt_login_works(self):
+        response = self.client.post(
+            reverse("token_obtain_pair"),
+            {"email": "seeker@example.com", "password": "password123"},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("access", response.data)
+
+    def test_admin_keeps_the_full_stack(self):
+        User.objects.create_superuser(email="admin@example.com", password="password123")
+        self.client.force_authenticate(None)
+
+        response = self.client.get("/admin/login/")
+        self.assertEqual(response.headers["X-Frame-Options"], "DENY")
+        self.assertIn("csrftoken", response.cookies)
+
+        response = self.client.post(
+            "/admin/login/",
+            {"username": "admin@example.com", "password": "password123"},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.client.get("/admin/").status_code, 200)
+
+    def test_overhead_benchmark_compares_both_stacks(self):
+        out = StringIO()
+
+        call_command(
+            "benchmark_api_overhead", requests=1, path=["/content/levels/"], stdout=out
+        )
+
+        header, row = out.getvalue().splitlines()
+        self.assertIn("full", header)
+        self.assertTrue(row.startswith("/content/levels/"))
+
+
+
+class PopulateDbTests(TestCase):
+    scale = {"users": 12, "levels": 3, "lessons_per_level": 4, "progress_density": 0.5, "seed": 7}
+
+    def populate(self, **options):
+        call_command("populate_db", stdout=StringIO(), **{**self.scale, **options})
+        return sorted(
+            UserProgress.objects.values_list(
+                "user__email", "lesson__title", "is_completed", "bookmarked"
+            )
+        )
+
+    def test_scale_mode_generates_the_requested_dataset(self):
+        version = catalog.get_version()
+
+        rows = self.populate()
+
+        self.assertEqual(User.objects.count(), 12)
+        self.assertEqual(Lesson.objects.filter(level__order_index=3).count(), 4)
+        self.assertTrue(rows)
+        self.assertTrue(User.objects.get(email="user1@example.com").check_password("password123"))
+        self.assertGreater(catalog.get_version(), version)
+        # Counters were rebuilt from the bulk-inserted rows
+        call_command("rebuild_level_stats", "--check", stdout=StringIO())
+
+    def test_progress_follows_course_order(self):
+        self.populate()
+
+        for user in User.objects.filter(userprogress__isnull=False).distinct():
+            rows = list(
+                UserProgress.objects.filter(user=user).order_by(
+                    "lesson__level__order_index", "lesson__order_index"
+                )
+            )
+            self.assertTrue(all(row.is_completed for row in rows[:-1]))
+            self.assertFalse(rows[-1].is_completed)
+
+    def test_same_seed_generates_the_same_data(self):
+        self.assertEqual(self.populate(), self.populate())
+        self.assertNotEqual(self.populate(), self.populate(seed=8))
+
+    def test_large_batches_stay_within_the_parameter_limit(self):
+        params = []
+
+        def count_params(execute, sql, sql_params, many, context):
+            params.append(len(sql_params or ()))
+            return execute(sql, sql_params, many, context)
+
+        # 10,000 progress rows of 7 columns would need 70,000 parameters
+        with connection.execute_wrapper(count_params):
+            self.populate(
+                users=500, levels=1, lessons_per_level=20, progress_density=1, batch_size=100_000
+            )
+
+        self.assertEqual(UserProgress.objects.count(), 10_000)
+        self.assertLessEqual(
+            max(params), connection.features.max_query_params or populate_db.MAX_QUERY_PARAMS
+        )
+
+    def test_copy_loads_the_same_rows(self):
+        if connection.vendor != "postgresql":
+            with self.assertRaises(CommandError):
+                self.populate(copy=True)
+            return
+
+        self.assertEqual(self.populate(copy=True), self.populate())
+
+
+class LoadBenchmarkTests(LiveServerTestCase):
+    def test_collection_is_mapped_to_project_routes(self):
+        endpoints = load_collection(settings.BASE_DIR / "bruno")
+
+        login = endpoints["Login"]
+        self.assertEqual((login.method, login.path), ("POST", "/accounts/login/"))
+        self.assertFalse(login.authenticated)
+        lessons = endpoints["lessons in level"]
+        self.assertEqual(lessons.path, "/content/levels/{id}/lessons/")
+        self.assertEqual(lessons.url_name, "level-lessons")
+        self.assertEqual(endpoints["progress batch"].body["records"][0]["is_completed"], True)
+
+    def test_reports_latency_per_endpoint(self):
+        call_command(
+            "populate_db", users=2, levels=2, lessons_per_level=3, stdout=StringIO()
+        )
+        out = StringIO()
+
+        call_command(
+            "benchmark_load",
+            base_url=self.live_server_url,
+            rps=40,
+            duration=0.5,
+            users=2,
+            weight=["progress=0", "progress batch=0"],
+            stdout=out,
+        )
+
+        report = json.loads(out.getvalue())
+        self.assertEqual(report["total"]["requests"], 20)
+        self.assertEqual(report["total"]["statuses"], {"200": 20})
+        for endpoint in report["endpoints"].values():
+            self.assertLessEqual(endpoint["p50_ms"], endpoint["p99_ms"])
+            self.assertTrue(endpoint["path"].startswith("/content/"))
+
+    def test_runs_without_a_single_request_are_refused(self):
+        call_command("populate_db", users=1, levels=1, lessons_per_level=1, stdout=StringIO())
+
+        with self.assertRaisesMessage(CommandError, "at least one request"):
+            call_command("benchmark_load", base_url=self.live_server_url, rps=1, duration=0.5)
+
+    def test_unreachable_server_is_reported(self):
+        call_command("populate_db", users=1, levels=1, lessons_per_level=1, stdout=StringIO())
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+
+        with self.assertRaisesMessage(CommandError, "Cannot reach"):
+            call_command(
+                "benchmark_load", base_url=f"http://127.0.0.1:{port}", users=1, duration=1, stdout=StringIO()
+            )
+
+    def test_percentiles_of_no_samples_are_empty(self):
+        self.assertIsNone(percentile([], 50))
+        self.assertEqual(percentile([0.1, 0.2, 0.3, 0.4], 50), 0.2)
+
+
+class ReadinessTests(TestCase):
+    def test_ready_when_the_database_answers(self):
+        response = self.client.get(reverse("readiness"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"status": "ok"})
+
+    def test_unavailable_without_the_database(self):
+        with mock.patch.object(connection, "cursor", side_effect=OperationalError):
+            response = self.client.get(reverse("readiness"))
+
+        self.assertEqual(response.status_code, 503)
+
+    def test_cold_start_benchmark_reports_against_the_target(self):
+        out = StringIO()
+
+        call_command("benchmark_cold_start", runs=1, target=60, stdout=out)
+        self.assertIn("(target 60.00s)", out.getvalue())
+
+        with self.assertRaises(CommandError):
+            call_command("benchmark_cold_start", runs=1, target=0, stdout=StringIO())
+
+
+def parse_server_timing(header):
+    metrics = {}
+    for metric in header.split(", "):
+        name, *params = metric.split(";")
+        metrics[name] = dict(param.split("=", 1) for param in params)
+    return metrics
+
+
+class TimingMiddlewareTests(ContentTestCase):
+    def test_server_timing_header(self):
+        url = reverse("level-list")
+        cold = parse_server_timing(self.client.get(url)["Server-Timing"])
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+
+        metrics = parse_server_timing(response["Server-Timing"])
+        self.assertEqual(set(metrics), {"total", "db", "serializer", "cache"})
+        self.assertGreater(float(metrics["total"]["dur"]), float(metrics["db"]["dur"]))
+        self.assertEqual(metrics["db"]["desc"], f'"{len(ctx.captured_queries)} queries"')
+        self.assertGreater(float(metrics["serializer"]["dur"]), 0)
+        self.assertRegex(cold["cache"]["desc"], r'^"hits=\d+ misses=[1-9]\d*"$')
+        self.assertRegex(metrics["cache"]["desc"], r'^"hits=[1-9]\d* misses=0"$')
+
+    def test_request_is_logged_as_json(self):
+        with self.assertLogs("core.timing", "INFO") as logs:
+            self.client.get(reverse("next-lesson"))
+
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line["view"], "NextLessonView")
+        self.assertEqual(line["path"], reverse("next-lesson"))
+        self.assertEqual(line["status"], 200)
+        self.assertGreater(line["queries"], 0)
+        self.assertEqual(
+            set(line),
+            {"method", "path", "view", "status", "total_ms", "db_ms", "queries",
+             "serializer_ms", "cache_hits", "cache_misses"},
+        )
+
+    def test_fast_requests_stay_out_of_the_slow_log(self):
+        with self.assertNoLogs("core.timing.slow"):
+            self.client.get(reverse("level-list"))
+
+    @override_settings(SLOW_REQUEST_MS=0, SLOW_QUERY_MS=0)
+    def test_slow_requests_and_queries_are_logged_with_their_sql(self):
+        with CaptureQueriesContext(connection) as ctx:
+            with self.assertLogs("core.timing.slow", "WARNING") as logs:
+                self.client.get(reverse("next-lesson"))
+
+        lines = [json.loads(record.getMessage()) for record in logs.records]
+        slow_queries = [line for line in lines if line["slow"] == "query"]
+        [slow_request] = [line for line in lines if line["slow"] == "request"]
+        sql = [query["sql"] for query in ctx.captured_queries]
+
+        self.assertEqual(len(slow_queries), len(sql))
+        for line in slow_queries:
+            self.assertEqual(line["view"], "NextLessonView")
+            self.assertTrue(any(query.startswith(line["sql"].split("%s")[0]) for query in sql))
+        self.assertEqual(slow_request["view"], "NextLessonView")
+        self.assertEqual(len(slow_request["queries"]), len(sql))
+
+
+def parse_metrics(text):
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(text)
+        for sample in family.samples
+    }
+
+
+@override_settings(METRICS_TOKEN="scrape-token")
+class MetricsTests(ContentTestCase):
+    # Metrics are process-wide, so tests compare scrapes before and after
+
+    def scrape(self):
+        response = self.client.get(
+            reverse("metrics"), headers={"Authorization": "Bearer scrape-token"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        return parse_metrics(response.content.decode())
+
+    def delta(self, before, after, name, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        return after.get(key, 0) - before.get(key, 0)
+
+    def test_scrapes_need_the_token(self):
+        self.client.force_authenticate(None)
+        url = reverse("metrics")
+
+        self.assertEqual(self.client.get(url).status_code, 403)
+        response = self.client.get(url, headers={"Authorization": "Bearer guess"})
+        self.assertEqual(response.status_code, 403)
+        with override_settings(METRICS_TOKEN=""):
+            self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_requests_are_counted_per_url_name(self):
+        lesson = Lesson.objects.first()
+        before = self.scrape()
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse("level-list"))
+            self.client.get(reverse("level-list"))
+            self.client.patch(reverse("progress-update", args=[lesson.id]), {"is_completed": True})
+        queries = len(ctx.captured_queries)
+        self.client.get("/nowhere/")
+
+        after = self.scrape()
+        requests = "http_requests_total"
+        self.assertEqual(self.delta(before, after, requests, url_name="level-list", method="GET", status="200"), 2)
+        self.assertEqual(self.delta(before, after, requests, url_name="progress-update", method="PATCH", status="200"), 1)
+        self.assertEqual(self.delta(before, after, requests, url_name="unmatched", method="GET", status="404"), 1)
+        self.assertEqual(
+            self.delta(before, after, "http_request_duration_seconds_count", url_name="level-list", method="GET"), 2
+        )
+        self.assertEqual(
+            self.delta(before, after, "db_queries_total", url_name="level-list")
+            + self.delta(before, after, "db_queries_total", url_name="progress-update"),
+            queries,
+        )
+
+    def test_cache_hit_ratio(self):
+        self.client.get(reverse("level-list"))
+        self.client.get(reverse("level-list"))
+
+        metrics = self.scrape()
+        hits = metrics[("cache_lookups_total", (("result", "hit"), ("url_name", "level-list")))]
+        misses = metrics[("cache_lookups_total", (("result", "miss"), ("url_name", "level-list")))]
+        ratio = metrics[("cache_hit_ratio", (("url_name", "level-list"),))]
+        self.assertAlmostEqual(ratio, hits / (hits + misses))
+        self.assertTrue(0 < ratio < 1)
+
+    def test_email_outbox_depth(self):
+        emails = [
+            OutgoingEmail.objects.enqueue("seeker@example.com", "Subject", "Body")
+            for _ in range(3)
+        ]
+        self.assertEqual(self.scrape()[("email_outbox_pending", ())], 3)
+
+        OutgoingEmail.objects.filter(pk=emails[0].pk).update(status=OutgoingEmail.SENT)
+        self.assertEqual(self.scrape()[("email_outbox_pending", ())], 2)
+
+
+class GunicornConfigTests(SimpleTestCase):
+    def test_several_workers_refuse_a_process_local_cache(self):
+        with tempfile.TemporaryDirectory() as metrics_dir:
+            result = subprocess.run(
+                [sys.executable, "-m", "gunicorn"],
+                cwd=settings.BASE_DIR,
+                env={
+                    **os.environ,
+                    "GUNICORN_BIND": "127.0.0.1:0",
+                    "GUNICORN_WORKERS": "2",
+                    "DJANGO_CACHE_BACKEND": "core.cache.LocMemCache",
+                    "PROMETHEUS_MULTIPROC_DIR": metrics_dir,
+                },
+                capture_output=True,
+                text=True,
+                timeout=60,
+            )
+
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn("process-local cache", result.stderr)
+
+    def test_uvicorn_workers_route_to_the_async_views(self):
+        # What on_starting does with several workers and no preload: load
+        # the settings in the master, before asgi.py is imported
+        script = (
+            "import runpy, django; from django.urls import resolve;"
+            "runpy.run_path('gunicorn.conf.py'); django.setup();"
+            "print(resolve('/content/levels/').func.view_class.__name__)"
+        )
+        for worker_class, view in [("uvicorn", "AsyncLevelListView"), ("gthread", "LevelListView")]:
+            with self.subTest(worker_class):
+                env = {
+                    **os.environ,
+                    "GUNICORN_WORKER_CLASS": worker_class,
+                    "DJANGO_SETTINGS_MODULE": "SeekerOfLight.settings",
+                }
+                env.pop("DJANGO_ASYNC_VIEWS", None)
+
+                result = subprocess.run(
+                    [sys.executable, "-c", script],
+                    cwd=settings.BASE_DIR,
+                    env=env,
+                    capture_output=True,
+                    text=True,
+                    timeout=60,
+                    check=True,
+                )
+
+                self.assertEqual(result.stdout.strip(), view)
+
+    def test_reading_the_config_keeps_the_metrics(self):
+        # gunicorn reads the file again on every HUP
+        with tempfile.TemporaryDirectory() as metrics_dir:
+            kept = os.path.join(metrics_dir, "counter_1.db")
+            open(kept, "w").close()
+
+            with mock.patch.dict(os.environ, {"PROMETHEUS_MULTIPROC_DIR": metrics_dir}):
+                runpy.run_path(os.path.join(settings.BASE_DIR, "gunicorn.conf.py"))
+
+            self.assertTrue(os.path.exists(kept))
+
+
+class MultiProcessMetricsTests(SimpleTestCase):
+    def test_workers_add_up_their_metrics(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            base_url = "http://127.0.0.1:%d" % sock.getsockname()[1]
+
+        with tempfile.TemporaryDirectory() as metrics_dir, tempfile.TemporaryDirectory() as cache_dir:
+            server = subprocess.Popen(
+                [sys.executable, "-m", "gunicorn"],
+                cwd=settings.BASE_DIR,
+                env={
+                    **os.environ,
+                    "GUNICORN_BIND": base_url.removeprefix("http://"),
+                    "GUNICORN_WORKERS": "2",
+                    "DJANGO_ALLOWED_HOST": "127.0.0.1",
+                    "PROMETHEUS_MULTIPROC_DIR": metrics_dir,
+                    # Several workers need a cache they share
+                    "DJANGO_CACHE_BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                    "DJANGO_CACHE_LOCATION": cache_dir,
+                    "METRICS_TOKEN": "scrape-token",
+                },
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            scrape = urllib.request.Request(
+                f"{base_url}/metrics", headers={"Authorization": "Bearer scrape-token"}
+            )
+            try:
+                ready = self.wait_until_ready(f"{base_url}/health/ready/")
+                # A new connection each, so both workers answer some
+                for _ in range(20):
+                    urllib.request.urlopen(f"{base_url}/health/ready/").close()
+                scrapes = [
+                    parse_metrics(urllib.request.urlopen(scrape).read().decode())
+                    for _ in range(4)
+                ]
+            finally:
+                server.terminate()
+                server.wait()
+
+        key = ("http_requests_total", (("method", "GET"), ("status", "200"), ("url_name", "readiness")))
+        for metrics in scrapes:
+            self.assertEqual(metrics[key], ready + 20)
+
+    def wait_until_ready(self, url, timeout=30):
+        """Returns how many readiness checks passed, i.e. 1."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                urllib.request.urlopen(url, timeout=5).close()
+                return 1
+            except OSError:
+                time.sleep(0.05)
+        self.fail(f"{url} was not ready after {timeout}s")
+
+
+class Budget(NamedTuple):
+    method: str
+    queries: int
+    ms: float
+    status: int = 200
+
+
+# The most SQL queries and milliseconds each route may take against
+# EndpointBudgetTests' scaled fixture. Queries are counted with every cache
+# cleared (the worst case); time is the fastest of `runs` requests, and is
+# only checked, scaled, under LATENCY_BUDGET_FACTOR.
+ENDPOINT_BUDGETS = {
+    # core.urls
+    "level-list": Budget("get", 3, 40),
+    "level-detail": Budget("get", 3, 40),
+    "level-lessons": Budget("get", 4, 100),
+    "lesson-detail": Budget("get", 3, 50),
+    "progress-update": Budget("patch", 7, 50),
+    "progress-batch": Budget("post", 8, 100),
+    "progress-summary": Budget("get", 2, 50),
+    "next-lesson": Budget("get", 4, 150),
+    "bookmarked-lessons": Budget("get", 2, 40),
+    # users.urls
+    "register": Budget("post", 3, 40, status=201),
+    "confirm_email": Budget("post", 2, 25),
+    "token_obtain_pair": Budget("post", 1, 25),
+    "token_refresh": Budget("post", 2, 25),
+    "change_password": Budget("put", 4, 40),
+    "reset_password": Budget("post", 2, 25),
+    "reset_password_confirm": Budget("post", 4, 40),
+    "profile": Budget("get", 1, 25),
+}
+
+
+@override_settings(PASSWORD_HASHER_PARAMS=FAST_HASHER_PARAMS)
+class EndpointBudgetTests(APITestCase):
+    """
+    Holds every route to its `ENDPOINT_BUDGETS` entry on a course of 10
+    levels of 20 lessons, with 50 users part-way through it, so an N+1
+    query or a slow path fails here rather than in production.
+    """
+
+    runs = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            "populate_db",
+            users=50,
+            levels=10,
+            lessons_per_level=20,
+            progress_density=0.4,
+            seed=1,
+            stdout=StringIO(),
+        )
+        cls.user = User.objects.get(email="user1@example.com")
+        cls.level = Level.objects.get(order_index=1)
+        cls.lessons = list(cls.level.lessons.all())
+        cls.other = User.objects.get(email="user2@example.com")
+
+    def authenticate(self, user):
+        token = TokenObtainPairSerializer.get_token(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token.access_token}")
+        return token
+
+    def build_request(self, name, run):
+        """
+        The (url, data) for request number `run` to the named route, and
+        authenticates the client as needed. Requests that change state use
+        fresh values every run.
+        """
+        self.client.credentials()
+        self.authenticate(self.user)
+        lesson = self.lessons[run % len(self.lessons)]
+        now = datetime.now(timezone.utc).isoformat()
+
+        if name in ("level-detail", "level-lessons"):
+            return reverse(name, args=[self.level.id]), None
+        if name == "lesson-detail":
+            return reverse(name, args=[lesson.id]), None
+        if name == "progress-update":
+            return reverse(name, args=[lesson.id]), {"is_completed": run % 2 == 0}
+        if name == "progress-batch":
+            records = [
+                {"lesson_id": lesson.id, "bookmarked": run % 2 == 0, "client_ts": now}
+                for lesson in self.lessons
+            ]
+            return reverse(name), {"records": records}
+        if name == "register":
+            self.client.credentials()
+            return reverse(name), {
+                "email": f"budget{run}@example.com",
+                "password": "password123",
+                "password2": "password123",
+                "first_name": "Budget",
+                "last_name": "Test",
+            }
+        if name in ("confirm_email", "reset_password_confirm"):
+            self.client.credentials()
+            token, uid = uid_token(User.objects.get(pk=self.other.pk))
+            data = {"new_password": f"password{run + 1}", "new_password2": f"password{run + 1}"}
+            return reverse(name, args=[uid, token]), data
+        if name == "token_obtain_pair":
+            self.client.credentials()
+            return reverse(name), {"email": self.user.email, "password": "password123"}
+        if name == "token_refresh":
+            self.client.credentials()
+            return reverse(name), {"refresh": str(TokenObtainPairSerializer.get_token(self.user))}
+        if name == "change_password":
+            self.authenticate(self.other)
+            self.other.set_password("old-password")
+            self.other.save()
+            return reverse(name), {
+                "old_password": "old-password",
+                "new_password": f"new-password{run}",
+                "new_password2": f"new-password{run}",
+            }
+        if name == "reset_password":
+            self.client.credentials()
+            return reverse(name), {"email": self.user.email}
+        return reverse(name), None
+
+    def measure(self, name, budget):
+        """
+        Returns (queries captured on the run with the most, fastest seconds).
+        """
+        worst, fastest = None, None
+        for run in range(self.runs):
+            url, data = self.build_request(name, run)
+            cache.clear()
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                response = getattr(self.client, budget.method)(url, data, format="json")
+                elapsed = time.perf_counter() - start
+            self.assertEqual(response.status_code, budget.status, response.content)
+            if worst is None or len(ctx.captured_queries) > len(worst):
+                worst = ctx.captured_queries
+            fastest = elapsed if fastest is None else min(fastest, elapsed)
+        return worst, fastest
+
+    def format_queries(self, queries):
+        return "\n".join(
+            f"{i}. [{query['time']}s] {query['sql']}" for i, query in enumerate(queries, 1)
+        )
+
+    def test_every_route_has_a_budget(self):
+        routes = {
+            pattern.name for pattern in core_urls.urlpatterns + users_urls.urlpatterns
+        }
+
+        self.assertEqual(routes, set(ENDPOINT_BUDGETS))
+
+    def test_endpoints_stay_within_budget(self):
+        for name, budget in ENDPOINT_BUDGETS.items():
+            with self.subTest(name):
+                queries, elapsed = self.measure(name, budget)
+                if len(queries) > budget.queries:
+                    self.fail(
+                        f"{name} ran {len(queries)} queries, budget {budget.queries}:\n"
+                        + self.format_queries(queries)
+                    )
+                limit = budget.ms * LATENCY_BUDGET_FACTOR
+                if limit and elapsed * 1000 > limit:
+                    self.fail(
+                        f"{name} took {elapsed * 1000:.1f} ms, budget {limit:g} ms:\n"
+                        + self.format_queries(queries)
+                    )
+
+# The URLconf ASGI serves (content endpoints routed to core.async_views)
+urlpatterns = [
+    path("admin/", admin.site.urls),
+    path("accounts/", include("users.urls")),
+    path("content/", include("core.async_urls")),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncViewTests(ContentTestCase):
+    def test_read_endpoints_resolve_to_async_views(self):
+        lesson = Lesson.objects.first()
+        urls = {
+            "level-list": reverse("level-list"),
+            "level-lessons": reverse("level-lessons", args=[lesson.level_id]),
+            "lesson-detail": reverse("lesson-detail", args=[lesson.id]),
+            "progress-summary": reverse("progress-summary"),
+            "next-lesson": reverse("next-lesson"),
+        }
+
+        for name, url in urls.items():
+            with self.subTest(name):
+                view_class = resolve(url).func.view_class
+                self.assertIs(view_class, async_views[name])
+                self.assertTrue(view_class.view_is_async)
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_responses_match_the_sync_views(self):
+        level = Level.objects.get(order_index=1)
+        self.complete(*level.lessons.all()[:2])
+        urls = [
+            reverse("level-list"),
+            reverse("level-lessons", args=[level.id]),
+            reverse("lesson-detail", args=[level.lessons.first().id]),
+            reverse("progress-summary"),
+            reverse("next-lesson"),
+        ]
+
+        for url in urls:
+            with self.subTest(url):
+                response = self.client.get(url)
+                with self.settings(ROOT_URLCONF="SeekerOfLight.urls"):
+                    expected = self.client.get(url)
+                self.assertEqual(response.data, expected.data)
+                self.assertEqual(response.get("ETag"), expected.get("ETag"))
+
+    def test_missing_lesson_is_not_found(self):
+        response = self.client.get(reverse("lesson-detail", args=[0]))
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_anonymous_requests_are_rejected(self):
+        self.client.force_authenticate(None)
+
+        response = self.client.get(reverse("progress-summary"))
+
+        self.assertEqual(response.status_code, 401)
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncLevelUnlockTests(LevelUnlockTests):
+    pass
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncProgressSummaryTests(ProgressSummaryTests):
+    pass
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncLessonProgressTests(LessonProgressTests):
+    pass
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncConditionalGetTests(ConditionalGetTests):
+    pass
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncNextLessonTests(NextLessonTests):
+    pass
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncTimingMiddlewareTests(ContentTestCase):
+    def setUp(self):
+        super().setUp()
+        token = TokenObtainPairSerializer.get_token(self.user)
+        self.headers = {"Authorization": f"Bearer {token.access_token}"}
+
+    async def test_async_views_are_timed(self):
+        with self.assertLogs("core.timing", "INFO") as logs:
+            response = await self.async_client.get(reverse("level-list"), headers=self.headers)
+
+        self.assertEqual(response.status_code, 200)
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line["view"], "AsyncLevelListView")
+        self.assertGreater(line["queries"], 0)
+        self.assertGreater(line["serializer_ms"], 0)
+        self.assertGreater(line["cache_misses"], 0)
+        metrics = parse_server_timing(response["Server-Timing"])
+        self.assertEqual(metrics["db"]["desc"], f'"{line["queries"]} queries"')
+
+
+@override_settings(ROOT_URLCONF=__name__, MIDDLEWARE=settings.API_MIDDLEWARE)
+class AsyncAPIModeTests(ContentTestCase):
+    def setUp(self):
+        super().setUp()
+        token = TokenObtainPairSerializer.get_token(self.user)
+        self.headers = {"Authorization": f"Bearer {token.access_token}"}
+
+    @override_settings(DEBUG=True)
+    def test_async_stack_needs_no_adapting(self):
+        # Django logs every sync/async adapter it has to insert
+        with self.assertNoLogs("django.request", "DEBUG"):
+            ASGIHandler()
+
+    async def test_api_requests_reach_async_views(self):
+        response = await self.async_client.get(reverse("level-list"), headers=self.headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Frame-Options", response.headers)
+
+    async def test_admin_keeps_the_full_stack(self):
+        response = await self.async_client.get("/admin/login/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["X-Frame-Options"], "DENY")
+        self.assertIn("csrftoken", response.cookies)
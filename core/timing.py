@@ -0,0 +1,113 @@
+"""
+Per-request timings collected by `core.middleware.TimingMiddleware`.
+
+While a request is handled, `current()` returns its `RequestTimings`;
+outside one it returns None and every hook below does nothing. The object
+lives in a context variable, so it follows the request into the worker
+threads that `sync_to_async` runs the ORM in under ASGI.
+
+- database: `instrument_connections()` gives every connection an execute
+  wrapper when it connects. Connections belong to a thread, and under ASGI
+  the queries don't run in the thread that handles the request.
+- cache: the backends in `core.cache` call `record_cache()`
+- serializers: DRF has no hook around `serializer.data`, so
+  `instrument_serializers()` wraps it
+
+Both `instrument_*()` functions run once from `CoreConfig.ready()`.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.db.backends.signals import connection_created
+from rest_framework.serializers import BaseSerializer
+
+_current = ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    def __init__(self):
+        self.start = perf_counter()
+        # (sql, seconds) for every query, in execution order
+        self.queries = []
+        self.serializer = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._serializing = False
+
+    @property
+    def db(self):
+        return sum((duration for _, duration in self.queries), 0.0)
+
+    def elapsed(self):
+        return perf_counter() - self.start
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def collect():
+    """Collects timings for the code inside the block."""
+    timings = RequestTimings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+def _time_query(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.queries.append((sql, perf_counter() - start))
+
+
+def _instrument_connection(sender, connection, **kwargs):
+    # Reconnects send the signal again. Wrappers added with
+    # `connection.execute_wrapper()` are popped from the end, so go first.
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _time_query)
+
+
+def instrument_connections():
+    connection_created.connect(_instrument_connection, dispatch_uid="core.timing")
+
+
+def record_cache(hits, misses):
+    timings = _current.get()
+    if timings is not None:
+        timings.cache_hits += hits
+        timings.cache_misses += misses
+
+
+def instrument_serializers():
+    """
+    Adds the time spent in top-level `serializer.data` calls to the current
+    request. Serializers nested inside another one are part of its time.
+    """
+    data = BaseSerializer.data.fget
+    if getattr(data, "timed", False):
+        return
+
+    def timed_data(serializer):
+        timings = _current.get()
+        if timings is None or timings._serializing:
+            return data(serializer)
+        timings._serializing = True
+        start = perf_counter()
+        try:
+            return data(serializer)
+        finally:
+            timings.serializer += perf_counter() - start
+            timings._serializing = False
+
+    timed_data.timed = True
+    BaseSerializer.data = property(timed_data)
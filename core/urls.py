@@ -13,6 +13,8 @@ urlpatterns = [
     # Progress tracking
     path('progress/<int:lesson_id>/', UserProgressView.as_view(), 
          name='progress-update'),
+    path('progress/batch/', UserProgressBatchView.as_view(), 
+         name='progress-batch'),
     path('progress/summary/', UserProgressSummaryView.as_view(), 
          name='progress-summary'),
     path('progress/next/', NextLessonView.as_view(), 
@@ -1,11 +1,20 @@
+from django.db import transaction
+from django.db.models import F
+from django.http import Http404
 from django.utils import timezone
 from rest_framework import generics, status, permissions
 from rest_framework.response import Response
-from .models import Level, Lesson, UserProgress
+from drf_spectacular.utils import extend_schema
+from . import catalog
+from .conditional import ConditionalContentMixin, bump_progress_version
+from .models import Level, Lesson, UserLevelStats, UserProgress
 from .serializers import (
     BookmarkSerializer,
+    ProgressSyncResultSerializer,
+    ProgressSyncSerializer,
     LevelSerializer, 
     LessonSerializer, 
+    LessonSummarySerializer,
     UserProgressSerializer,
     UserLevelProgressSerializer
 )
@@ -13,42 +22,68 @@ from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
-class LevelListView(generics.ListAPIView):
+class LevelListView(ConditionalContentMixin, generics.ListAPIView):
     """List active levels with unlock status"""
     permission_classes = (permissions.IsAuthenticated,)
     serializer_class = LevelSerializer
-    queryset = Level.objects.filter(is_active=True).order_by('order_index')
+    queryset = Level.objects.active()
+    cursor_ordering = ('order_index',)
+
+    def get_queryset(self):
+        return catalog.with_unlock_state(
+            catalog.get_active_levels(), self.request.user
+        )
     
     def get_serializer_context(self):
         return {'request': self.request}
 
-class LevelDetailView(generics.RetrieveAPIView):
+class LevelDetailView(ConditionalContentMixin, generics.RetrieveAPIView):
     """Retrieve single level details"""
     serializer_class = LevelSerializer
     lookup_field = 'id'
-    queryset = Level.objects.filter(is_active=True)
+    queryset = Level.objects.active()
+
+    def get_object(self):
+        level = catalog.get_level(self.kwargs['id'])
+        if level is None or not level.is_active:
+            raise Http404
+        self.check_object_permissions(self.request, level)
+        return catalog.with_unlock_state([level], self.request.user)[0]
     
     def get_serializer_context(self):
         return {'request': self.request}
 
-class LevelLessonsView(generics.ListAPIView):
+class LevelLessonsView(ConditionalContentMixin, generics.ListAPIView):
     """List lessons for a specific level"""
-    serializer_class = LessonSerializer
+    serializer_class = LessonSummarySerializer
     
     def get_queryset(self):
-        level_id = self.kwargs['id']
-        return Lesson.objects.filter(
-            level__id=level_id, is_active=True
-        ).order_by('order_index')
+        level = catalog.get_level(self.kwargs['id'])
+        if level is None or not level.is_active:
+            return []
+        return catalog.with_user_progress(
+            catalog.get_level_lessons(level.id), self.request.user
+        )
     
     def get_serializer_context(self):
         return {'request': self.request}
 
-class LessonDetailView(generics.RetrieveAPIView):
+class LessonDetailView(ConditionalContentMixin, generics.RetrieveAPIView):
     """Retrieve lesson details with user progress"""
     serializer_class = LessonSerializer
     lookup_field = 'id'
     queryset = Lesson.objects.all()
+
+    def get_object(self):
+        lesson = catalog.get_lesson(self.kwargs['id'])
+        if lesson is None:
+            raise Http404
+        self.check_object_permissions(self.request, lesson)
+        return catalog.with_user_progress([lesson], self.request.user)[0]
+
+    def get_catalog_modified(self, request, *args, **kwargs):
+        lesson = catalog.get_lesson(kwargs['id'])
+        return lesson.updated_at if lesson else None
     
     def get_serializer_context(self):
         return {'request': self.request}
@@ -60,53 +95,81 @@ class UserProgressView(generics.UpdateAPIView, generics.CreateAPIView):
     lookup_field = 'lesson_id'
 
     def get_object(self):
-        lesson_id = self.kwargs['lesson_id']
+        # Only the lesson is looked up; the progress row is upserted
+        lesson = catalog.get_lesson(self.kwargs['lesson_id'])
+        if lesson is None:
+            raise Http404
+        return lesson
+
+    @transaction.atomic
+    def update(self, request, *args, **kwargs):
+        partial = kwargs.pop('partial', False)
+        lesson = self.get_object()
+        serializer = self.get_serializer(data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+
+        # Automatically set completion timestamp
+        now = timezone.now()
+        values = {**serializer.validated_data, 'changed_at': now}
+        if values.get('is_completed', False):
+            values['completed_at'] = now
+
         user = self.request.user
-        
-        obj, created = UserProgress.objects.get_or_create(
-            user=user,
-            lesson_id=lesson_id
+        progress, was_completed, was_bookmarked = UserProgress.objects.upsert(
+            user, lesson.id, **values
         )
-        return obj
-    
-    def perform_update(self, serializer):
-        # Automatically set completion timestamp
-        if serializer.validated_data.get('is_completed', False):
-            serializer.save(completed_at=timezone.now())
-        else:
-            serializer.save()
+        UserLevelStats.objects.bump(
+            user,
+            lesson.level_id,
+            completed=progress.is_completed - was_completed,
+            bookmarked=progress.bookmarked - was_bookmarked,
+        )
+        bump_progress_version(user.pk)
+        # Again once committed, so no stale read is cached under the new ETag
+        transaction.on_commit(lambda: bump_progress_version(user.pk))
+
+        serializer.instance = progress
+        return Response(serializer.data)
     
     def create(self, request, *args, **kwargs):
         # Use update logic since we're upserting
         return self.update(request, *args, **kwargs)
 
+class UserProgressBatchView(generics.GenericAPIView):
+    """Apply a batch of offline progress records (last writer wins)"""
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = ProgressSyncSerializer
+    pagination_class = None
+
+    @extend_schema(responses=ProgressSyncResultSerializer(many=True))
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        user = self.request.user
+        results = UserProgress.objects.sync(user, serializer.validated_data['records'])
+        # sync() has committed by now
+        bump_progress_version(user.pk)
+
+        data = [
+            {'lesson_id': record['lesson_id'], 'status': result, 'progress': progress}
+            for record, result, progress in results
+        ]
+        return Response(ProgressSyncResultSerializer(data, many=True).data)
+
 class UserProgressSummaryView(generics.ListAPIView):
     """Get user's progress summary across all levels"""
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = UserLevelProgressSerializer
+    # One row per level, always returned whole
+    pagination_class = None
     
     def get_queryset(self):
-        user = self.request.user
-        levels = Level.objects.filter(is_active=True)
-        progress_data = []
-        
-        for level in levels:
-            total_lessons = level.lessons.count()
-            completed = UserProgress.objects.filter(
-                user=user,
-                lesson__level=level,
-                is_completed=True
-            ).count()
-            percentage = int((completed / total_lessons) * 100) if total_lessons else 0
-            
-            progress_data.append({
-                'level_id': level.id,
-                'completed': completed,
-                'total': total_lessons,
-                'percentage': percentage
-            })
-        
-        return progress_data
+        return (
+            Level.objects.active()
+            .with_progress(self.request.user)
+            .values("completed", "total", "percentage", level_id=F("id"))
+        )
     
     def list(self, request, *args, **kwargs):
         queryset = self.get_queryset()
@@ -116,49 +179,31 @@ class UserProgressSummaryView(generics.ListAPIView):
 class NextLessonView(generics.GenericAPIView):
     """Get user's next recommended lesson"""
     permission_classes = [permissions.IsAuthenticated]
-    serializer_class = LessonSerializer
+    serializer_class = LessonSummarySerializer
 
     def get(self, request, *args, **kwargs):
-        user = self.request.user
-        
-        # 1. Check last accessed incomplete lesson
-        last_accessed = UserProgress.objects.filter(
-            user=user,
-            is_completed=False
-        ).order_by('-last_accessed').first()
-        
-        if last_accessed:
-            lesson = last_accessed.lesson
+        return self.respond(catalog.get_next_lesson(self.request.user))
+
+    def respond(self, lesson):
+        if lesson:
             serializer = self.get_serializer(lesson)
             return Response(serializer.data)
         
-        # 2. Find first uncompleted lesson in first unlocked level
-        for level in Level.objects.filter(is_active=True).order_by('order_index'):
-            if not level.is_level_unlocked(user):
-                continue
-                
-            lesson = level.lessons.exclude(
-                userprogress__user=user,
-                userprogress__is_completed=True
-            ).order_by('order_index').first()
-            
-            if lesson:
-                serializer = self.get_serializer(lesson)
-                return Response(serializer.data)
-        
         # No lessons found
         return Response(
             {"detail": "All lessons completed. Congratulations!"},
             status=status.HTTP_204_NO_CONTENT
         )
 class BookmarkedLessonsView(generics.ListAPIView):
+    permission_classes = [permissions.IsAuthenticated]
     serializer_class = BookmarkSerializer
     
     def get_queryset(self):
+        # Paged in SQL: a power user's bookmarks are unbounded
         bookmarked_lessons = Lesson.objects.filter(
                 userprogress__user=self.request.user,
                 userprogress__bookmarked=True
-            ).order_by('level__order_index', 'order_index')
+            ).summaries().select_related('level').order_by('level__order_index', 'order_index')
         return bookmarked_lessons
 
     def get_serializer_context(self):
@@ -1,32 +1,27 @@
 #!/bin/sh
+set -e
 
-# Wait for PostgreSQL using netcat
-until nc -z -v -w5 $POSTGRES_HOST 5432; do
-  >&2 echo "PostgreSQL is unavailable - sleeping"
-  sleep 2
-done
-
-# Collect static files
-echo "Collect static files"
-uv run manage.py collectstatic --noinput
-
-# Apply database migrations
-echo "Apply database make migrations"
-uv run manage.py makemigrations 
-
-# Apply database migrations
-echo "Apply database migrations"
-uv run manage.py migrate 
+# Migrations run once per deploy (`docker-entrypoint.sh release`, see the
+# django-release service in compose.yml) and static files are collected
+# when the image is built, so starting a replica only starts the server.
+# Readiness is reported by GET /health/ready/ instead of waiting for
+# PostgreSQL here.
 
+if [ "$1" = "release" ]; then
+    # Apply database migrations
+    echo "Apply database migrations"
+    exec python manage.py migrate --noinput
+fi
 
-if [ $DJANGO_DEBUG -eq 1 ]; then 
+if [ "$DJANGO_DEBUG" = "1" ]; then
     # Start Debug Server
+    echo "Apply database migrations"
+    python manage.py migrate --noinput
     echo "Starting Development server"
-    uv run manage.py runserver 0.0.0.0:8000
+    exec python manage.py runserver 0.0.0.0:8000
 fi
 
-if [ $DJANGO_DEBUG -eq 0 ]; then 
-    # Start Debug Server
-    echo "Starting Production server"
-    gunicorn SeekerOfLight.wsgi:application --bind, 0.0.0.0:8000
-fi
\ No newline at end of file
+# Start Production server
+echo "Starting Production server"
+# App, bind address and worker model come from gunicorn.conf.py
+exec gunicorn
@@ -0,0 +1,107 @@
+"""
+Gunicorn configuration, read from the working directory on start-up.
+
+Every setting can be overridden with an environment variable:
+
+GUNICORN_WORKER_CLASS  uvicorn (default, serves SeekerOfLight.asgi with the
+                       async views), gthread or sync (serve SeekerOfLight.wsgi)
+GUNICORN_WORKERS       worker processes; defaults to one per usable CPU, or
+                       2 * CPUs + 1 for the sync worker. More than one needs
+                       a shared cache (DJANGO_CACHE_BACKEND)
+GUNICORN_THREADS       threads per gthread worker (default 4)
+GUNICORN_BIND          address to listen on (default 0.0.0.0:8000)
+GUNICORN_TIMEOUT, GUNICORN_GRACEFUL_TIMEOUT, GUNICORN_KEEPALIVE,
+GUNICORN_MAX_REQUESTS, GUNICORN_MAX_REQUESTS_JITTER, GUNICORN_PRELOAD
+PROMETHEUS_MULTIPROC_DIR  where workers share their /metrics values
+                       (default: seeker-of-light-metrics in the temp dir)
+
+https://docs.gunicorn.org/en/stable/settings.html
+"""
+
+import os
+import shutil
+import tempfile
+from os import environ
+
+WORKER_CLASSES = {
+    "uvicorn": ("uvicorn_worker.UvicornWorker", "SeekerOfLight.asgi:application"),
+    "gthread": ("gthread", "SeekerOfLight.wsgi:application"),
+    "sync": ("sync", "SeekerOfLight.wsgi:application"),
+}
+
+# CPUs this process may run on (honours affinity/cpusets, unlike cpu_count())
+cpus = os.process_cpu_count() or 1
+
+worker_class, wsgi_app = WORKER_CLASSES[environ.get("GUNICORN_WORKER_CLASS", "uvicorn")]
+
+# What SeekerOfLight/asgi.py sets as well, but on_starting below may load
+# the settings before it is imported (GUNICORN_PRELOAD=0)
+if worker_class == WORKER_CLASSES["uvicorn"][0]:
+    environ.setdefault("DJANGO_ASYNC_VIEWS", "1")
+
+# Async and threaded workers overlap I/O themselves; sync workers need spares
+workers = int(environ.get("GUNICORN_WORKERS") or (cpus * 2 + 1 if worker_class == "sync" else cpus))
+threads = int(environ.get("GUNICORN_THREADS", 4)) if worker_class == "gthread" else 1
+
+bind = environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+
+# Import Django once in the arbiter; workers share the loaded modules
+# copy-on-write. Nothing opens a database connection at import time, and
+# post_fork below drops any that would be inherited anyway.
+preload_app = environ.get("GUNICORN_PRELOAD", "1") == "1"
+
+# Seconds a silent worker is allowed before it is killed and restarted
+timeout = int(environ.get("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+# Seconds an idle client connection is kept open
+keepalive = int(environ.get("GUNICORN_KEEPALIVE", 5))
+
+# Recycle workers after this many requests (jittered so they don't restart
+# together) to bound slow memory growth
+max_requests = int(environ.get("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = int(environ.get("GUNICORN_MAX_REQUESTS_JITTER", 100))
+
+# Every worker writes its Prometheus values to files in this directory and
+# /metrics adds them up (see core.metrics). It has to be set before
+# prometheus_client is imported. This file is read again on every HUP, so
+# the directory is only emptied in on_starting below.
+metrics_dir = environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "seeker-of-light-metrics")
+)
+
+
+def on_starting(server):
+    # Catalog, progress and token versions live in the cache; workers that
+    # each keep their own would answer 304s and accept tokens from stale ones
+    if server.cfg.workers > 1:
+        import django
+        from django.conf import settings
+        from django.core.cache.backends.locmem import LocMemCache
+        from django.utils.module_loading import import_string
+
+        os.environ.setdefault("DJANGO_SETTINGS_MODULE", "SeekerOfLight.settings")
+        django.setup()
+        backend = settings.CACHES["default"]["BACKEND"]
+        if issubclass(import_string(backend), LocMemCache):
+            raise RuntimeError(
+                f"{server.cfg.workers} workers can't share the process-local cache "
+                f"{backend}; set DJANGO_CACHE_BACKEND to a shared one such as "
+                "core.cache.RedisCache, or GUNICORN_WORKERS=1."
+            )
+
+    # Counts start at zero with each new master, not with each reload
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+
+
+def post_fork(server, worker):
+    from django.db import connections
+
+    for connection in connections.all(initialized_only=True):
+        connection.close()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import User
+from .models import OutgoingEmail, User
+from .tokens import revoke_tokens
 
 # Register your models here.
 
@@ -9,3 +10,16 @@ from .models import User
 class UserAdmin(admin.ModelAdmin):
     list_display = ["get_full_name", "email", "date_joined", "country", "is_active"]
     list_display_links = ["get_full_name"]
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change and "is_active" in form.changed_data and not obj.is_active:
+            # Outstanding JWTs still claim the account is active
+            revoke_tokens(obj)
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ["subject", "to", "status", "attempts", "next_attempt_at", "sent_at"]
+    list_filter = ["status"]
+    search_fields = ["to", "subject"]
@@ -0,0 +1,54 @@
+from django.core.exceptions import ValidationError
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .tokens import get_token_version
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that builds `request.user` from the token's claims
+    instead of selecting it from the `user` table.
+
+    Tokens issued by `LoginView` carry `is_active` and `token_version`. The
+    user is a `User` with only those fields and its id loaded; touching any
+    other field loads the rest in one query (see `User.refresh_from_db`).
+    The claimed `token_version` must match the current one, which is cached
+    for at most `TOKEN_VERSION_CACHE_TIMEOUT` seconds, so `revoke_tokens()`
+    takes effect at once on a shared cache and within that bound otherwise.
+
+    Tokens without those claims fall back to the regular database lookup.
+    """
+
+    def get_user(self, validated_token):
+        if "is_active" not in validated_token or "token_version" not in validated_token:
+            return super().get_user(validated_token)
+
+        try:
+            user_id = self.user_model._meta.get_field(api_settings.USER_ID_FIELD).to_python(
+                validated_token[api_settings.USER_ID_CLAIM]
+            )
+        except (KeyError, ValidationError) as e:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            ) from e
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not validated_token["is_active"]:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        version = get_token_version(user_id)
+        if version is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if version != validated_token["token_version"]:
+            raise AuthenticationFailed(
+                _("Token has been revoked"), code="token_revoked"
+            )
+
+        return self.user_model.from_db(
+            router.db_for_read(self.user_model),
+            [api_settings.USER_ID_FIELD, "is_active", "token_version"],
+            [user_id, validated_token["is_active"], version],
+        )
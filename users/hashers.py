@@ -0,0 +1,47 @@
+"""
+Password hashers whose cost comes from `settings.PASSWORD_HASHER_PARAMS`.
+
+They keep Django's algorithm names, so stored hashes stay compatible in both
+directions. Changing a cost parameter makes `must_update()` true for hashes
+made with the old one, and Django re-hashes them the next time the user logs
+in; the same happens to hashes from any hasher that isn't first in
+`PASSWORD_HASHERS`.
+"""
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+def _params(algorithm):
+    return settings.PASSWORD_HASHER_PARAMS[algorithm]
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return _params("pbkdf2_sha256")["iterations"]
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    @property
+    def time_cost(self):
+        return _params("argon2")["time_cost"]
+
+    @property
+    def memory_cost(self):
+        return _params("argon2")["memory_cost"]
+
+    @property
+    def parallelism(self):
+        return _params("argon2")["parallelism"]
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    @property
+    def work_factor(self):
+        return _params("scrypt")["work_factor"]
+
+    @property
+    def maxmem(self):
+        # hashlib refuses anything above 32 MiB unless told otherwise
+        return 2 * 128 * self.block_size * self.work_factor
@@ -0,0 +1,99 @@
+import multiprocessing
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher, get_hashers
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+
+def _hash_for(hasher, seconds):
+    """
+    Hashes a fixed password with `hasher` for about `seconds`. Returns (hashes, elapsed).
+    """
+    salt = hasher.salt()
+    count = 0
+    start = time.perf_counter()
+    while True:
+        hasher.encode("correct horse battery staple", salt)
+        count += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return count, elapsed
+
+
+def _worker(args):
+    algorithm, seconds = args
+    return _hash_for(get_hasher(algorithm), seconds)
+
+
+class Command(BaseCommand):
+    """
+    A Django management command that measures password hashing throughput.
+
+    Logins, registrations and password changes each cost one hash, so
+    hashes/sec per worker is the ceiling on those requests per worker. With
+    `--workers N` the hashers run in N processes at once, showing how the
+    rate holds up once every core is busy.
+
+    Usage:
+    python manage.py benchmark_hashers
+    python manage.py benchmark_hashers --profile argon2 --workers 4 --seconds 5
+    """
+    help = 'Measures hashes/sec per worker for the configured password hashers.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--profile',
+            choices=sorted(settings.PASSWORD_HASHER_PROFILES),
+            help='Benchmark a PASSWORD_HASHER_PROFILES entry instead of PASSWORD_HASHERS.',
+        )
+        parser.add_argument(
+            '--algorithm',
+            action='append',
+            help='Only benchmark this algorithm (repeatable). Defaults to the preferred hasher.',
+        )
+        parser.add_argument('--all', action='store_true', help='Benchmark every configured hasher.')
+        parser.add_argument('--seconds', type=float, default=2, help='Time spent on each hasher.')
+        parser.add_argument('--workers', type=int, default=1, help='Processes hashing in parallel.')
+
+    def handle(self, *args, **options):
+        hashers = settings.PASSWORD_HASHERS
+        if options['profile']:
+            hashers = settings.PASSWORD_HASHER_PROFILES[options['profile']]
+
+        with override_settings(PASSWORD_HASHERS=hashers):
+            configured = get_hashers()
+            if options['algorithm']:
+                algorithms = options['algorithm']
+            elif options['all']:
+                algorithms = [hasher.algorithm for hasher in configured]
+            else:
+                algorithms = [configured[0].algorithm]
+
+            self.stdout.write(
+                f'{"algorithm":<24}{"workers":>8}{"hashes/s/worker":>18}{"total hashes/s":>16}{"ms/hash":>10}'
+            )
+            for algorithm in algorithms:
+                try:
+                    get_hasher(algorithm)
+                except ValueError as e:
+                    raise CommandError(e)
+                self._report(algorithm, options['seconds'], options['workers'])
+
+    def _report(self, algorithm, seconds, workers):
+        try:
+            if workers > 1:
+                # fork keeps the overridden settings in the children
+                with multiprocessing.get_context('fork').Pool(workers) as pool:
+                    results = pool.map(_worker, [(algorithm, seconds)] * workers)
+            else:
+                results = [_worker((algorithm, seconds))]
+        except (ImportError, ValueError) as e:
+            self.stdout.write(self.style.WARNING(f'{algorithm:<24}skipped: {e}'))
+            return
+
+        per_worker = sum(count / elapsed for count, elapsed in results) / len(results)
+        self.stdout.write(
+            f'{algorithm:<24}{workers:>8}{per_worker:>18.1f}{per_worker * workers:>16.1f}{1000 / per_worker:>10.2f}'
+        )
@@ -0,0 +1,93 @@
+import time
+
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from users.models import OutgoingEmail
+
+
+class Command(BaseCommand):
+    """
+    A Django management command that delivers the `OutgoingEmail` outbox.
+
+    Due emails are claimed in batches (`SELECT ... FOR UPDATE SKIP LOCKED` where
+    supported, so several workers can run side by side) in a short transaction
+    that marks them as sending. They are then sent outside any transaction over
+    a single reused connection from the configured `EMAIL_BACKEND`, and each
+    result is recorded as soon as it is known. Failures are retried with
+    exponential backoff until `OutgoingEmail.MAX_ATTEMPTS` is reached, after
+    which the email is marked as failed. Claims left behind by a worker that
+    stopped are released after `OutgoingEmail.CLAIM_TIMEOUT`.
+
+    Usage:
+    python manage.py send_queued_mail
+    python manage.py send_queued_mail --loop --interval 5
+    """
+    help = 'Sends queued outbound emails in batches, retrying failures with backoff.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help='Emails claimed per batch.')
+        parser.add_argument('--loop', action='store_true', help='Keep polling for new emails.')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds between polls with --loop.')
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = self._drain(options['batch_size'])
+            if sent or failed:
+                self.stdout.write(f'Sent {sent} emails, {failed} failed.')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def _drain(self, batch_size):
+        """
+        Sends batches until nothing is due. Returns (sent, failed) counts.
+        """
+        total_sent = total_failed = 0
+        OutgoingEmail.objects.release_stale()
+        connection = get_connection()
+        try:
+            while True:
+                emails = OutgoingEmail.objects.claim(batch_size)
+                sent, failed = self._send_batch(connection, emails)
+                total_sent += sent
+                total_failed += failed
+                if len(emails) < batch_size:
+                    return total_sent, total_failed
+        finally:
+            connection.close()
+
+    def _send_batch(self, connection, emails):
+        sent = failed = 0
+        for email in emails:
+            try:
+                # No-op while open; an explicitly opened connection stays open across sends
+                connection.open()
+                message = EmailMultiAlternatives(
+                    email.subject,
+                    email.body,
+                    email.from_email or None,
+                    [email.to],
+                    connection=connection,
+                )
+                if email.html_body:
+                    message.attach_alternative(email.html_body, 'text/html')
+                message.send()
+            except Exception as e:
+                # Drop a possibly broken connection; the next email reopens it
+                connection.close()
+                failed += 1
+                email.last_error = f'{type(e).__name__}: {e}'
+                if email.attempts >= OutgoingEmail.MAX_ATTEMPTS:
+                    email.status = OutgoingEmail.FAILED
+                else:
+                    email.status = OutgoingEmail.PENDING
+                    email.next_attempt_at = timezone.now() + OutgoingEmail.objects.backoff(email.attempts)
+            else:
+                sent += 1
+                email.status = OutgoingEmail.SENT
+                email.sent_at = timezone.now()
+                email.last_error = ''
+            # Recorded right away, so a worker stopping mid-batch doesn't resend it
+            email.save(update_fields=['status', 'next_attempt_at', 'last_error', 'sent_at'])
+        return sent, failed
@@ -1,4 +1,8 @@
+from datetime import timedelta
+
 from django.contrib.auth.base_user import BaseUserManager
+from django.db import models, transaction
+from django.utils import timezone
 
 
 class UserManager(BaseUserManager):
@@ -32,3 +36,58 @@ class UserManager(BaseUserManager):
             raise ValueError("Superuser must have is_superuser=True.")
 
         return self._create_user(email, password, **extra_fields)
+
+
+class OutgoingEmailManager(models.Manager):
+    def enqueue(self, to, subject, body, from_email=None, html_body=None):
+        """
+        Queues an email for the `send_queued_mail` worker instead of sending it inline.
+        """
+        return self.create(
+            to=to,
+            subject=subject,
+            body=body,
+            from_email=from_email or "",
+            html_body=html_body or "",
+        )
+
+    def due(self, now=None):
+        """
+        Returns pending emails whose next attempt is due, oldest first.
+        """
+        return self.filter(
+            status=self.model.PENDING, next_attempt_at__lte=now or timezone.now()
+        ).order_by("next_attempt_at")
+
+    @transaction.atomic
+    def claim(self, batch_size):
+        """
+        Marks up to `batch_size` due emails as sending, counting the attempt,
+        and returns them. The row locks end with this transaction, so no
+        mail server is waited on while they are held.
+        """
+        now = timezone.now()
+        emails = list(self.due(now).select_for_update(skip_locked=True)[:batch_size])
+        for email in emails:
+            email.status = self.model.SENDING
+            email.claimed_at = now
+            email.attempts += 1
+        self.bulk_update(emails, ["status", "claimed_at", "attempts"])
+        return emails
+
+    def release_stale(self, now=None):
+        """
+        Makes emails claimed longer than `CLAIM_TIMEOUT` ago due again: the
+        worker that claimed them stopped before recording a result.
+        """
+        now = now or timezone.now()
+        return self.filter(
+            status=self.model.SENDING, claimed_at__lte=now - self.model.CLAIM_TIMEOUT
+        ).update(status=self.model.PENDING, next_attempt_at=now)
+
+    @staticmethod
+    def backoff(attempts, base=60, cap=60 * 60):
+        """
+        Exponential delay before retry number `attempts` (60s, 120s, 240s, ... up to an hour).
+        """
+        return timedelta(seconds=min(base * 2 ** (attempts - 1), cap))
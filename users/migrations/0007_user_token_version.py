@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-17 01:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0006_outgoingemail"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="token_version",
+            field=models.PositiveIntegerField(default=0, verbose_name="token version"),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0007_user_token_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="outgoingemail",
+            name="claimed_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="claimed at"
+            ),
+        ),
+        migrations.AddField(
+            model_name="outgoingemail",
+            name="html_body",
+            field=models.TextField(blank=True, verbose_name="HTML body"),
+        ),
+        migrations.AlterField(
+            model_name="outgoingemail",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("sending", "Sending"),
+                    ("sent", "Sent"),
+                    ("failed", "Failed"),
+                ],
+                default="pending",
+                max_length=10,
+                verbose_name="status",
+            ),
+        ),
+    ]
@@ -1,11 +1,13 @@
+from datetime import timedelta
+
 from django.contrib.auth.base_user import AbstractBaseUser
 from django.contrib.auth.models import PermissionsMixin
-from django.core.mail import send_mail
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django_countries.fields import CountryField
 
-from .managers import UserManager
+from .managers import OutgoingEmailManager, UserManager
 
 # Create your models here.
 
@@ -37,6 +39,7 @@ class User(AbstractBaseUser, PermissionsMixin):
         avatar (ImageField): An optional profile picture for the user.
         date_of_birth (DateField): The date when the user was born.
         phone_number (CharField): The user's phone number.
+        token_version (PositiveIntegerField): Embedded in issued JWTs; bumping it revokes them.
     """
 
     first_name = models.CharField(_("first name"), max_length=30)
@@ -48,6 +51,7 @@ class User(AbstractBaseUser, PermissionsMixin):
     # avatar = models.ImageField(upload_to='avatars/', null=True, blank=True)
     date_of_birth = models.DateField(_("date of birth"), null=True, blank=True)
     country = CountryField(null=True)
+    token_version = models.PositiveIntegerField(_("token version"), default=0)
     # phone_number = models.CharField(_("phone number"), max_length=15, null=True, blank=True)
 
     objects = UserManager()
@@ -60,6 +64,16 @@ class User(AbstractBaseUser, PermissionsMixin):
         verbose_name = _("user")
         verbose_name_plural = _("users")
 
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        """
+        Loads every deferred field at once when one of them is first accessed,
+        so a user built from token claims costs at most one query.
+        """
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred.issuperset(fields):
+            fields = deferred
+        super().refresh_from_db(using, fields, from_queryset)
+
     def get_full_name(self):
         """
         Returns the first_name plus the last_name, with a space in between.
@@ -73,9 +87,70 @@ class User(AbstractBaseUser, PermissionsMixin):
         """
         return self.first_name
 
-    def email_user(self, subject, message, **kwargs):
+    def email_user(self, subject, message, from_email="noreplay@SoL.com", html_message=None):
         """
-        Sends an email to this User.
+        Queues an email to this User; `manage.py send_queued_mail` delivers it
+        and retries failures, so there is no `fail_silently` to pass.
         """
-        send_mail(subject, message, "noreplay@SoL.com", [self.email], **kwargs)
+        OutgoingEmail.objects.enqueue(
+            self.email, subject, message, from_email, html_body=html_message
+        )
         print(message)
+
+
+class OutgoingEmail(models.Model):
+    """
+    A durable outbox entry for mail sent on behalf of a request.
+
+    Requests only insert rows here, so their latency doesn't depend on the
+    mail server. The `send_queued_mail` worker claims due rows in batches
+    (status `sending`), delivers them over one SMTP connection and records
+    each result, retrying failures with exponential backoff until
+    `MAX_ATTEMPTS` is reached. A claim older than `CLAIM_TIMEOUT` belongs to
+    a worker that died, and its rows are due again.
+    """
+
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, _("Pending")),
+        (SENDING, _("Sending")),
+        (SENT, _("Sent")),
+        (FAILED, _("Failed")),
+    ]
+    MAX_ATTEMPTS = 5
+    CLAIM_TIMEOUT = timedelta(minutes=10)
+
+    to = models.EmailField(_("to"))
+    from_email = models.CharField(_("from"), max_length=254, blank=True)
+    subject = models.CharField(_("subject"), max_length=255)
+    body = models.TextField(_("body"))
+    html_body = models.TextField(_("HTML body"), blank=True)
+    status = models.CharField(
+        _("status"), max_length=10, choices=STATUS_CHOICES, default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(_("attempts"), default=0)
+    next_attempt_at = models.DateTimeField(_("next attempt at"), default=timezone.now)
+    claimed_at = models.DateTimeField(_("claimed at"), null=True, blank=True)
+    last_error = models.TextField(_("last error"), blank=True)
+    created_at = models.DateTimeField(_("created at"), auto_now_add=True)
+    sent_at = models.DateTimeField(_("sent at"), null=True, blank=True)
+
+    objects = OutgoingEmailManager()
+
+    class Meta:
+        db_table = "outgoing_email"
+        verbose_name = _("outgoing email")
+        verbose_name_plural = _("outgoing emails")
+        indexes = [
+            models.Index(
+                fields=["next_attempt_at"],
+                condition=models.Q(status="pending"),
+                name="outgoing_email_due_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to} ({self.status})"
@@ -1,8 +1,14 @@
 # In your_app/serializers.py
 
 from django.contrib.auth import get_user_model
+from django.urls import reverse
 from rest_framework import serializers
 from django_countries.serializer_fields import CountryField
+from rest_framework_simplejwt import serializers as jwt_serializers
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .tokens import get_token_version, revoke_tokens, uid_token
 
 User = get_user_model()
 
@@ -85,6 +91,9 @@ class PasswordChangeSerializer(serializers.Serializer):
         # The set_password method handles hashing.
         instance.set_password(validated_data.get("new_password"))
         instance.save()
+
+        # 3. Tokens issued with the old password stop working
+        revoke_tokens(instance)
         
         return instance
 
@@ -112,10 +121,9 @@ class PasswordResetSerializer(serializers.Serializer):
                 reverse("reset_password_confirm", kwargs={"uidb64": uid, "token": token})
             )
 
-            user.send_mail(
+            user.email_user(
                 subject="Password Reset Request",
                 message=f"Hello, please use the following link to reset your password: {reset_link}",
-                fail_silently=False,
             )
         except User.DoesNotExist:
             pass
@@ -162,3 +170,32 @@ class EmailVerificationSerializer(serializers.Serializer):
 
     def validate(self, data):
         return data
+
+
+class TokenObtainPairSerializer(jwt_serializers.TokenObtainPairSerializer):
+    """
+    Adds the claims `StatelessJWTAuthentication` builds `request.user` from.
+    Access tokens inherit them from the refresh token.
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token["is_active"] = user.is_active
+        token["token_version"] = user.token_version
+        return token
+
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    """
+    Refuses refresh tokens issued before the user's tokens were revoked.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        version = refresh.get("token_version")
+        if version is not None and version != get_token_version(
+            refresh.get(api_settings.USER_ID_CLAIM)
+        ):
+            raise InvalidToken("Token has been revoked")
+        return super().validate(attrs)
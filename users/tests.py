@@ -1,3 +1,400 @@
-from django.test import TestCase
+import socket
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from aiosmtpd.controller import Controller
+from django.conf import settings
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .authentication import StatelessJWTAuthentication
+from .models import OutgoingEmail, User
 
 # Create your tests here.
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class RecordingHandler:
+    """
+    An aiosmtpd handler that keeps every message and the client address it came from.
+    """
+
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append((session.peer, envelope))
+        return "250 Message accepted for delivery"
+
+
+class StoppingBackend(locmem.EmailBackend):
+    """
+    Delivers like the locmem backend, noting each row's status at send time,
+    and stops the worker (like a SIGTERM) at message number `stop_at`.
+    """
+
+    stop_at = None
+    statuses = []
+
+    def send_messages(self, messages):
+        for message in messages:
+            self.statuses.append(OutgoingEmail.objects.get(to=message.to[0]).status)
+            if len(self.statuses) == self.stop_at:
+                raise SystemExit
+        return super().send_messages(messages)
+
+
+class OutgoingEmailQueueTests(APITestCase):
+    def test_registration_queues_email_without_sending(self):
+        response = self.client.post(
+            reverse("register"),
+            {
+                "email": "new@example.com",
+                "password": "s3cret-pass",
+                "password2": "s3cret-pass",
+                "first_name": "New",
+                "last_name": "User",
+            },
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.to, "new@example.com")
+        self.assertEqual(email.status, OutgoingEmail.PENDING)
+        self.assertIn("/accounts/confirm_email/", email.body)
+
+    def test_password_reset_queues_email(self):
+        User.objects.create_user(email="reset@example.com", password="s3cret-pass")
+
+        response = self.client.post(
+            reverse("reset_password"), {"email": "reset@example.com"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.subject, "Password Reset Request")
+        self.assertIn("/accounts/reset_password/confirm/", email.body)
+
+
+class SendQueuedMailTests(TestCase):
+    def enqueue(self, count):
+        for i in range(count):
+            OutgoingEmail.objects.enqueue(f"user{i}@example.com", f"Subject {i}", "Body")
+
+    def test_sends_due_emails_and_marks_them_sent(self):
+        self.enqueue(3)
+        later = OutgoingEmail.objects.enqueue("later@example.com", "Later", "Body")
+        later.next_attempt_at = timezone.now() + timedelta(hours=1)
+        later.save()
+
+        call_command("send_queued_mail", batch_size=2, stdout=StringIO())
+
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(
+            OutgoingEmail.objects.filter(status=OutgoingEmail.SENT).count(), 3
+        )
+        later.refresh_from_db()
+        self.assertEqual(later.status, OutgoingEmail.PENDING)
+
+    @override_settings(
+        EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+        EMAIL_HOST="127.0.0.1",
+        EMAIL_TIMEOUT=1,
+    )
+    def test_failures_back_off_then_give_up(self):
+        self.enqueue(1)
+
+        with self.settings(EMAIL_PORT=free_port()):
+            call_command("send_queued_mail", stdout=StringIO())
+
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.status, OutgoingEmail.PENDING)
+        self.assertEqual(email.attempts, 1)
+        self.assertGreater(email.next_attempt_at, timezone.now())
+        self.assertIn("ConnectionRefusedError", email.last_error)
+
+        for attempt in range(2, OutgoingEmail.MAX_ATTEMPTS + 1):
+            OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+            with self.settings(EMAIL_PORT=free_port()):
+                call_command("send_queued_mail", stdout=StringIO())
+
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutgoingEmail.FAILED)
+        self.assertEqual(email.attempts, OutgoingEmail.MAX_ATTEMPTS)
+
+    @override_settings(EMAIL_BACKEND=f"{__name__}.StoppingBackend")
+    def test_results_are_recorded_per_email(self):
+        self.enqueue(3)
+        StoppingBackend.statuses = []
+        StoppingBackend.stop_at = 2
+
+        with self.assertRaises(SystemExit):
+            call_command("send_queued_mail", stdout=StringIO())
+
+        # Claimed before any mail went out
+        self.assertEqual(StoppingBackend.statuses, [OutgoingEmail.SENDING] * 2)
+        statuses = dict(OutgoingEmail.objects.values_list("to", "status"))
+        self.assertEqual(
+            statuses,
+            {
+                "user0@example.com": OutgoingEmail.SENT,
+                "user1@example.com": OutgoingEmail.SENDING,
+                "user2@example.com": OutgoingEmail.SENDING,
+            },
+        )
+
+        # The stopped worker's claims are only released after the timeout
+        StoppingBackend.stop_at = None
+        call_command("send_queued_mail", stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+
+        OutgoingEmail.objects.filter(status=OutgoingEmail.SENDING).update(
+            claimed_at=F("claimed_at") - OutgoingEmail.CLAIM_TIMEOUT
+        )
+        call_command("send_queued_mail", stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertFalse(OutgoingEmail.objects.exclude(status=OutgoingEmail.SENT).exists())
+
+    def test_html_message_is_sent_as_an_alternative(self):
+        user = User.objects.create_user(email="html@example.com", password="s3cret-pass")
+
+        user.email_user("Welcome", "Hello", html_message="<p>Hello</p>")
+        call_command("send_queued_mail", stdout=StringIO())
+
+        self.assertEqual(mail.outbox[0].body, "Hello")
+        self.assertEqual(mail.outbox[0].alternatives[0][0], "<p>Hello</p>")
+        with self.assertRaises(TypeError):
+            user.email_user("Welcome", "Hello", fail_silently=True)
+
+    def test_backoff_grows_exponentially_up_to_cap(self):
+        delays = [
+            OutgoingEmail.objects.backoff(n).total_seconds() for n in range(1, 10)
+        ]
+        self.assertEqual(delays[:3], [60, 120, 240])
+        self.assertEqual(delays[-1], 3600)
+
+    def test_batch_is_sent_over_one_smtp_connection(self):
+        handler = RecordingHandler()
+        controller = Controller(handler, hostname="127.0.0.1", port=free_port())
+        controller.start()
+        self.addCleanup(controller.stop)
+        self.enqueue(5)
+
+        with self.settings(
+            EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+            EMAIL_HOST=controller.hostname,
+            EMAIL_PORT=controller.port,
+        ):
+            call_command("send_queued_mail", batch_size=2, stdout=StringIO())
+
+        self.assertEqual(len(handler.messages), 5)
+        self.assertEqual(len({peer for peer, envelope in handler.messages}), 1)
+        self.assertFalse(
+            OutgoingEmail.objects.exclude(status=OutgoingEmail.SENT).exists()
+        )
+
+
+# Cheap enough to keep the tests quick, still distinct per algorithm
+FAST_HASHER_PARAMS = {
+    "pbkdf2_sha256": {"iterations": 1000},
+    "argon2": {"time_cost": 1, "memory_cost": 1024, "parallelism": 1},
+    "scrypt": {"work_factor": 2**10},
+}
+
+
+@override_settings(PASSWORD_HASHER_PARAMS=FAST_HASHER_PARAMS)
+class PasswordHashingTests(APITestCase):
+    def login(self):
+        return self.client.post(
+            reverse("token_obtain_pair"),
+            {"email": "hash@example.com", "password": "s3cret-pass"},
+        )
+
+    def create_user(self):
+        return User.objects.create_user(
+            email="hash@example.com", password="s3cret-pass", is_active=True
+        )
+
+    def test_profiles_put_their_hasher_first(self):
+        for profile, hashers in settings.PASSWORD_HASHER_PROFILES.items():
+            with self.settings(PASSWORD_HASHERS=hashers):
+                user = User(email=f"{profile}@example.com")
+                user.set_password("s3cret-pass")
+                self.assertTrue(user.password.startswith(profile))
+
+    def test_login_upgrades_hash_to_preferred_hasher(self):
+        user = self.create_user()
+        self.assertTrue(user.password.startswith("pbkdf2_sha256$"))
+
+        with self.settings(
+            PASSWORD_HASHERS=settings.PASSWORD_HASHER_PROFILES["argon2"]
+        ):
+            self.assertEqual(self.login().status_code, 200)
+            user.refresh_from_db()
+            self.assertTrue(user.password.startswith("argon2$"))
+            self.assertEqual(self.login().status_code, 200)
+
+    def test_login_rehashes_when_cost_changes(self):
+        user = self.create_user()
+        params = {**FAST_HASHER_PARAMS, "pbkdf2_sha256": {"iterations": 2000}}
+
+        with self.settings(PASSWORD_HASHER_PARAMS=params):
+            self.assertEqual(self.login().status_code, 200)
+
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith("pbkdf2_sha256$2000$"))
+
+    def test_scrypt_cost_above_default_memory_limit(self):
+        params = {**FAST_HASHER_PARAMS, "scrypt": {"work_factor": 2**15}}
+
+        with self.settings(
+            PASSWORD_HASHER_PARAMS=params,
+            PASSWORD_HASHERS=settings.PASSWORD_HASHER_PROFILES["scrypt"],
+        ):
+            user = self.create_user()
+            self.assertTrue(user.password.startswith("scrypt$32768$"))
+            self.assertTrue(user.check_password("s3cret-pass"))
+
+    def test_benchmark_reports_hashes_per_second(self):
+        out = StringIO()
+
+        call_command(
+            "benchmark_hashers", profile="scrypt", seconds=0.01, stdout=out
+        )
+
+        lines = out.getvalue().splitlines()
+        self.assertIn("hashes/s/worker", lines[0])
+        self.assertTrue(lines[1].startswith("scrypt"))
+
+
+@override_settings(PASSWORD_HASHER_PARAMS=FAST_HASHER_PARAMS)
+class StatelessJWTAuthenticationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="jwt@example.com",
+            password="s3cret-pass",
+            first_name="Jay",
+            is_active=True,
+        )
+        self.tokens = self.login()
+
+    def login(self, password="s3cret-pass"):
+        return self.client.post(
+            reverse("token_obtain_pair"),
+            {"email": "jwt@example.com", "password": password},
+        ).json()
+
+    def authenticate(self, access):
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {access}")
+        return StatelessJWTAuthentication().authenticate(request)[0]
+
+    def get(self, name, authentication, access=None):
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {access or self.tokens['access']}"
+        )
+        with mock.patch.object(APIView, "authentication_classes", [authentication]):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse(name))
+        return response, len(queries)
+
+    def test_user_is_built_from_claims(self):
+        self.authenticate(self.tokens["access"])
+
+        with self.assertNumQueries(0):
+            user = self.authenticate(self.tokens["access"])
+            self.assertEqual(user.pk, self.user.pk)
+            self.assertTrue(user.is_authenticated)
+            self.assertTrue(user.is_active)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, "jwt@example.com")
+            self.assertEqual(user.first_name, "Jay")
+
+    def test_content_requests_skip_the_user_query(self):
+        for name in ["progress-summary", "next-lesson", "bookmarked-lessons"]:
+            with self.subTest(name):
+                # Warm the catalog and token-version caches
+                self.get(name, StatelessJWTAuthentication)
+
+                response, stateful = self.get(name, JWTAuthentication)
+                self.assertLess(response.status_code, 300)
+                response, stateless = self.get(name, StatelessJWTAuthentication)
+
+                self.assertLess(response.status_code, 300)
+                self.assertEqual(stateless, stateful - 1)
+
+    def test_password_change_revokes_tokens(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.tokens['access']}")
+        response = self.client.put(
+            reverse("change_password"),
+            {
+                "old_password": "s3cret-pass",
+                "new_password": "n3w-s3cret-pass",
+                "new_password2": "n3w-s3cret-pass",
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+
+        response, _ = self.get("progress-summary", StatelessJWTAuthentication)
+        self.assertEqual(response.status_code, 401)
+
+        self.client.credentials()
+        response = self.client.post(
+            reverse("token_refresh"), {"refresh": self.tokens["refresh"]}
+        )
+        self.assertEqual(response.status_code, 401)
+
+        fresh = self.login("n3w-s3cret-pass")
+        response, _ = self.get(
+            "progress-summary", StatelessJWTAuthentication, fresh["access"]
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_revocations_elsewhere_expire_the_cached_version(self):
+        self.authenticate(self.tokens["access"])
+        # Revoked by a process that doesn't share this one's cache
+        User.objects.filter(pk=self.user.pk).update(token_version=F("token_version") + 1)
+        self.authenticate(self.tokens["access"])
+
+        expired = time.time() + settings.TOKEN_VERSION_CACHE_TIMEOUT + 1
+        with mock.patch("time.time", return_value=expired):
+            with self.assertRaises(AuthenticationFailed):
+                self.authenticate(self.tokens["access"])
+
+    def test_refreshed_access_tokens_keep_the_claims(self):
+        response = self.client.post(
+            reverse("token_refresh"), {"refresh": self.tokens["refresh"]}
+        )
+
+        with self.assertNumQueries(0):
+            user = self.authenticate(response.json()["access"])
+        self.assertEqual(user.pk, self.user.pk)
+
+    def test_tokens_without_claims_fall_back_to_lookup(self):
+        access = str(AccessToken.for_user(self.user))
+
+        with self.assertNumQueries(1):
+            user = self.authenticate(access)
+        self.assertEqual(user.email, "jwt@example.com")
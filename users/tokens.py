@@ -0,0 +1,57 @@
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from .models import User
+
+
+def uid_token(user) -> (str, str):
+    token = default_token_generator.make_token(user)
+    uid = urlsafe_base64_encode(force_bytes(user.pk))
+
+    return token, uid
+
+
+def _token_version_key(user_id):
+    return f"user:{user_id}:token_version"
+
+
+def get_token_version(user_id):
+    """
+    The `token_version` a JWT for `user_id` must carry to be accepted, or
+    None if there is no such user. Read from the cache, falling back to the
+    database on a miss; entries expire after
+    `settings.TOKEN_VERSION_CACHE_TIMEOUT`.
+    """
+    key = _token_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = (
+            User.objects.filter(pk=user_id)
+            .values_list("token_version", flat=True)
+            .first()
+        )
+        if version is not None:
+            cache.set(key, version, settings.TOKEN_VERSION_CACHE_TIMEOUT)
+    return version
+
+
+def revoke_tokens(user):
+    """
+    Invalidates every JWT issued to `user` so far; called when the password
+    changes or the account is deactivated.
+
+    Immediate wherever the cache is shared; a process with its own cache may
+    accept the old tokens until its entry expires.
+    """
+    User.objects.filter(pk=user.pk).update(token_version=F("token_version") + 1)
+    user.refresh_from_db(fields=["token_version"])
+
+    key = _token_version_key(user.pk)
+    cache.delete(key)
+    # Again once committed, dropping a version re-cached from the old row
+    transaction.on_commit(lambda: cache.delete(key))
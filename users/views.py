@@ -1,8 +1,6 @@
 from django.contrib.auth.tokens import default_token_generator
 from django.core.mail import send_mail
 from django.shortcuts import reverse
-from django.utils.encoding import force_bytes
-from django.utils.http import urlsafe_base64_encode
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
@@ -21,6 +19,8 @@ from .serializers import EmailVerificationSerializer, PasswordResetConfirmSerial
 from .serializers import (
     PasswordChangeSerializer,
     PasswordResetSerializer,
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
     UserRegistrationSerializer,
     UserProfileSerializer,
 )
@@ -28,24 +28,18 @@ from .serializers import (
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 from .models import User
+from .tokens import revoke_tokens, uid_token
 
 # Create your views here.
 
 
-def uid_token(user: User) -> (str, str):
-    token = default_token_generator.make_token(user)
-    uid = urlsafe_base64_encode(force_bytes(user.pk))
-
-    return token, uid
-
-
 class UserRegistrationView(CreateAPIView):
     """
     User registration view using CreateAPIView for conciseness.
     """
     # The queryset is often used for list views, but it's good practice
     # to include it for schema generation and other DRF features.
-    queryset = User.objects.first() 
+    queryset = User.objects.all()
     serializer_class = UserRegistrationSerializer
 
     def create(self, request, *args, **kwargs):
@@ -75,7 +69,6 @@ class UserRegistrationView(CreateAPIView):
                 subject="Email Activation Request",
                 message=f"Hello, please use the following link to activate your account: {confirm_link}",
                 from_email="noreply@yourapi.com",
-                fail_silently=False,
             )
             # --- Your custom logic ends here ---
 
@@ -165,6 +158,7 @@ class PasswordResetConfirmView(GenericAPIView):
         if user is not None and default_token_generator.check_token(user, token):
             user.set_password(serializer.validated_data["new_password"])
             user.save()
+            revoke_tokens(user)
             return Response(
                 {"message": "Password has been reset successfully."},
                 status=status.HTTP_200_OK,
@@ -216,8 +210,8 @@ class EmailVerification(GenericAPIView):
 
 
 class LoginView(TokenObtainPairView):
-    pass 
+    serializer_class = TokenObtainPairSerializer
 
 
 class RefreshView(TokenRefreshView):
-    pass 
+    serializer_class = TokenRefreshSerializer